@@ -1,8 +1,17 @@
 import os
+import time
 from langchain_anthropic import ChatAnthropic
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.utils.singleflight import SingleFlight
+from app.services.chat.sessions import ChatSession, ChatSessionStore
+from app.services.chat.routing import FAST, FULL, RouteDecision, RouteMetrics, classify_question
+from app.services.llm.prompt_caching import cached_system_message, is_cacheable, prompt_cache_usage, text_block
+from app.services.rag.context_assembly import estimate_tokens
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -14,19 +23,193 @@ llm = ChatAnthropic(
     max_retries=6,
 )
 
+CHAT_SYSTEM_PROMPT = "You are a teaching assistant for grade 1 to grade 6. Answer the student's questions."
+
 prompt = ChatPromptTemplate.from_messages(
     [
-        ("system", "You are a teaching assistant for grade 1 to grade 6. Answer the student's questions."),
+        ("system", CHAT_SYSTEM_PROMPT),
         ("human", "{text}"),
     ]
 )
 
 chain = prompt | llm
 
-def get_chat_response(text: str) -> str:
+# Smaller, faster model with a tight output limit for simple questions
+# ("what is 7x8?", short definitions); anything else goes to Sonnet
+fast_llm = ChatAnthropic(
+    model=settings.chat_fast_model,
+    temperature=0,
+    max_tokens=settings.chat_fast_max_tokens,
+    max_retries=6,
+)
+
+fast_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", CHAT_SYSTEM_PROMPT + " Keep the answer short and simple."),
+        ("human", "{text}"),
+    ]
+)
+
+fast_chain = fast_prompt | fast_llm
+
+# Latency and token usage per route
+route_metrics = RouteMetrics()
+
+# Identical concurrent questions share one Claude call
+chat_requests = SingleFlight("chat", timeout=settings.coalesce_timeout_chat)
+
+def route_question(text: str) -> RouteDecision:
+    """Pick the model for a question; low-confidence "fast" guesses go to the full model"""
+    if not settings.chat_routing_enabled:
+        return RouteDecision(FULL, 1.0, ["routing disabled"])
+    decision = classify_question(text)
+    if decision.route == FAST and decision.confidence < settings.chat_routing_min_confidence:
+        decision = RouteDecision(FULL, decision.confidence, decision.reasons + ["low confidence"])
+    print(f"🧭 Chat route: {decision.route} ({decision.confidence}; {', '.join(decision.reasons)})")
+    return decision
+
+def needs_escalation(response) -> bool:
+    """A fast answer that hit its token limit (or came back empty) is redone by the full model"""
+    stop_reason = (getattr(response, "response_metadata", None) or {}).get("stop_reason")
+    return stop_reason == "max_tokens" or not response.text.strip()
+
+async def _routed_answer(text: str):
+    decision = route_question(text)
+    if decision.route == FAST:
+        started = time.perf_counter()
+        response = await fast_chain.ainvoke({"text": text})
+        escalate = needs_escalation(response)
+        route_metrics.record(FAST, time.perf_counter() - started, response, escalated=escalate)
+        if not escalate:
+            return response
+        print(f"⤴️  Fast answer incomplete, escalating to {llm.model}")
+
+    started = time.perf_counter()
+    response = await chain.ainvoke({"text": text})
+    route_metrics.record(FULL, time.perf_counter() - started, response)
+    return response
+
+async def get_chat_response(text: str) -> str:
     """Get chat response from the teaching assistant AI"""
     try:
-        response = chain.invoke({"text": text})
+        response = await chat_requests.do(SingleFlight.make_key(text), lambda: _routed_answer(text))
         return response.content
     except Exception as e:
-        return f"Sorry, I encountered an error: {str(e)}"
\ No newline at end of file
+        return f"Sorry, I encountered an error: {str(e)}"
+
+async def stream_chat_response(text: str):
+    """
+    Stream the teaching assistant's answer as it is generated.
+
+    Yields event dicts: {'event': 'token', 'data': {'text': ...}} per chunk,
+    then {'event': 'done', 'data': {...usage}} (or {'event': 'error', ...}).
+    If a fast-model answer turns out incomplete, {'event': 'reset'} is sent
+    and the full model's answer is streamed from the start.
+    """
+    decision = route_question(text)
+    routes = [(FAST, fast_chain), (FULL, chain)] if decision.route == FAST else [(FULL, chain)]
+    try:
+        for route, route_chain in routes:
+            started = time.perf_counter()
+            streamed = None
+            async for chunk in route_chain.astream({"text": text}):
+                streamed = chunk if streamed is None else streamed + chunk
+                if chunk.content:
+                    yield {'event': 'token', 'data': {'text': chunk.content}}
+            escalate = route == FAST and (streamed is None or needs_escalation(streamed))
+            route_metrics.record(route, time.perf_counter() - started, streamed, escalated=escalate)
+            if not escalate:
+                break
+            print(f"⤴️  Fast answer incomplete, escalating to {llm.model}")
+            yield {'event': 'reset', 'data': {'reason': 'escalated to the full model'}}
+        usage = (streamed.usage_metadata if streamed is not None else None) or {}
+        yield {
+            'event': 'done',
+            'data': {
+                'route': route,
+                'input_tokens': usage.get('input_tokens', 0),
+                'output_tokens': usage.get('output_tokens', 0),
+            },
+        }
+    except Exception as e:
+        print(f"❌ Error while streaming chat response: {e}")
+        yield {'event': 'error', 'data': {'message': f"Sorry, I encountered an error: {str(e)}"}}
+
+# WebSocket conversations: per-session history, evicted when idle
+chat_sessions = ChatSessionStore(
+    max_sessions=settings.chat_session_max,
+    idle_seconds=settings.chat_session_idle_seconds,
+)
+
+# Static prefix of every session turn
+session_system_message = cached_system_message(
+    CHAT_SYSTEM_PROMPT + " Use the earlier conversation for follow-up questions.",
+    name="chat_session",
+)
+
+def build_session_messages(session: ChatSession, text: str) -> list:
+    """
+    Prompt for one session turn: system prefix, digest of dropped turns,
+    the retained history and the new question. Once system + history pass
+    the caching minimum, the last history message carries a cache
+    breakpoint so the next turn reads the conversation from cache.
+    """
+    system_blocks = list(session_system_message.content)
+    digest = session.digest_text()
+    if digest:
+        system_blocks.append(text_block(digest))
+    messages = [SystemMessage(content=system_blocks)]
+
+    # Below the caching minimum the breakpoint would be ignored, so skip it
+    prefix_tokens = sum(estimate_tokens(block["text"]) for block in system_blocks) + session.history_tokens
+    cache_history = is_cacheable(prefix_tokens)
+    for i, (role, turn_text) in enumerate(session.turns):
+        content = turn_text
+        if cache_history and i == len(session.turns) - 1:
+            content = [text_block(turn_text, cache=True)]
+        messages.append(HumanMessage(content=content) if role == "human" else AIMessage(content=content))
+
+    messages.append(HumanMessage(content=text))
+    return messages
+
+async def stream_session_turn(session: ChatSession, text: str):
+    """
+    Answer one message in a conversation, streaming the reply.
+
+    History is trimmed to settings.chat_history_token_budget before the
+    turn. Yields {'event': 'token', ...} chunks, then {'event': 'done', ...}
+    with token/cache usage and history size (or {'event': 'error', ...}).
+    """
+    async with session.lock:
+        trimmed = session.trim(
+            token_budget=settings.chat_history_token_budget,
+            low_watermark=settings.chat_history_low_watermark,
+            digest_token_budget=settings.chat_digest_token_budget,
+        )
+        messages = build_session_messages(session, text)
+
+        streamed = None
+        try:
+            async for chunk in llm.astream(messages):
+                streamed = chunk if streamed is None else streamed + chunk
+                if chunk.content:
+                    yield {'event': 'token', 'data': {'text': chunk.text}}
+        except Exception as e:
+            print(f"❌ Error in chat session {session.session_id}: {e}")
+            yield {'event': 'error', 'data': {'message': f"Sorry, I encountered an error: {str(e)}"}}
+            return
+
+        answer = streamed.text if streamed is not None else ""
+        session.add_exchange(text, answer)
+        usage = prompt_cache_usage.record("chat_session", streamed) if streamed is not None else {}
+        yield {
+            'event': 'done',
+            'data': {
+                'session_id': session.session_id,
+                'exchanges': session.exchanges,
+                'history_tokens': session.history_tokens,
+                'trimmed': trimmed,
+                'usage': usage,
+            },
+        }
+
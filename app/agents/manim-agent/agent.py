@@ -10,7 +10,7 @@ import warnings
 import logging
 import re
 import uuid
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -24,6 +24,13 @@ sys.path.append(str(project_root))
 
 from app.core.config import settings
 from app.utils.gcp_storage import GCPStorageUploader
+from app.services.manim.scene_validator import validate_scene_code, format_validation_errors
+from app.services.manim.render_jobs import build_render_command, expected_video_path
+from app.services.manim.sandbox import limits_for_quality, run_sandboxed
+from app.services.manim.packaging import package_video, upload_package, public_url
+from app.services.manim.templates import TEMPLATES, TemplateMatch, PrerenderedVariantStore, match_template
+from app.utils.singleflight import SingleFlight
+from app.services.llm.prompt_caching import cached_system_message, prompt_cache_usage
 
 # Clean up warnings and logging
 warnings.filterwarnings("ignore")
@@ -54,6 +61,52 @@ print("🏁 Claude AI configuration completed")
 # Global variables
 manim_llm = None
 
+# Rules for generated scenes - identical on every call, so they form the system prefix (cached once past the API's caching minimum)
+MANIM_SYSTEM_PROMPT = """You are a Manim animation expert. Generate Python code for Manim animations following these rules:
+
+IMPORTANT GUIDELINES:
+- Import: from manim import *
+- NO MathTex() or LaTeX - use Text() instead
+- For multiple objects, position them using coordinates (e.g., UP, DOWN, LEFT, RIGHT)
+- Use clear timing with self.wait() between actions
+- Use all the shapes you know to generate real life objects, like use ellipse for clouds etc.
+
+POSITIONING TIPS:
+- Use UP, DOWN, LEFT, RIGHT, UL, UR, DL, DR for positioning
+- For multiple shapes: shape1.shift(LEFT*2), shape2.shift(RIGHT*2)
+- Use Transform() to morph one shape into another
+- Use Create() to draw objects, FadeIn/FadeOut for appearance
+
+EXAMPLE STRUCTURE:
+```python
+from manim import *
+
+class SceneName(Scene):
+    def construct(self):
+        # Create objects
+        circle = Circle().shift(LEFT*2)
+        square = Square().shift(RIGHT*2)
+
+        # Animate them
+        self.play(Create(circle))
+        self.wait(0.5)
+        self.play(Create(square))
+        self.wait(1)
+
+        # Transform or move
+        self.play(Transform(circle, square.copy().shift(LEFT*2)))
+        self.wait(2)
+```
+
+Always have supporting text in the scene. Return ONLY the Python code, no explanations."""
+manim_system_message = cached_system_message(MANIM_SYSTEM_PROMPT, name="manim")
+
+# Manifest of rendered template variants (shared across requests and restarts)
+template_variants = PrerenderedVariantStore(os.path.join(MANIM_MEDIA_DIR, "templates", "manifest.json"))
+
+# Identical concurrent prompts share one generation + render
+animation_requests = SingleFlight("manim-animation", timeout=settings.coalesce_timeout_animation)
+
 def extract_video_path(response_text):
     """Extract video file path from agent response"""
     print(f"🔍 Searching for video path in response: {response_text}")
@@ -85,6 +138,39 @@ def extract_video_path(response_text):
     print("❌ No video path found in response")
     return None
 
+def extract_scene_code(response_text: str) -> str:
+    """Pull the Python code out of a Claude response and make sure manim is imported"""
+    scene_code = response_text
+
+    # Extract Python code if wrapped in markdown
+    if "```python" in scene_code:
+        scene_code = scene_code.split("```python")[1].split("```")[0].strip()
+    elif "```" in scene_code:
+        scene_code = scene_code.split("```")[1].split("```")[0].strip()
+
+    # Ensure it has the import
+    if "from manim import" not in scene_code:
+        scene_code = "from manim import *\n\n" + scene_code
+
+    return scene_code
+
+async def repair_scene_code(scene_name: str, scene_code: str, validation: Dict[str, Any]) -> str:
+    """Ask Claude to fix scene code that failed static validation (single pass)"""
+    repair_prompt = f"""The following Manim code for the scene class '{scene_name}' failed validation:
+
+```python
+{scene_code}
+```
+
+Problems found:
+{format_validation_errors(validation)}
+
+Fix every problem listed above. Keep the class name '{scene_name}', do not use MathTex() or Tex(), keep each self.wait() under 10 seconds and keep loops short. Return ONLY the corrected Python code, no explanations."""
+
+    response = await manim_llm.ainvoke([manim_system_message, HumanMessage(content=repair_prompt)])
+    prompt_cache_usage.record("manim", response)
+    return extract_scene_code(response.content)
+
 def create_manim_scene_code(scene_name: str, scene_code: str) -> str:
     """Create a Python file with Manim scene code"""
     scene_dir = os.path.join(MANIM_MEDIA_DIR, f"scene_{scene_name}")
@@ -97,70 +183,71 @@ def create_manim_scene_code(scene_name: str, scene_code: str) -> str:
 
     return scene_file
 
-def render_manim_scene(scene_file: str, scene_name: str, quality: str = "1080p60") -> Dict[str, Any]:
-    """Render a Manim scene and return the video path"""
+def render_manim_scene(scene_file: str, scene_name: str, quality: Optional[str] = None) -> Dict[str, Any]:
+    """Render a Manim scene (inside the resource-limited sandbox) and return the video path"""
     try:
+        quality = quality or settings.manim_render_quality
         scene_dir = os.path.dirname(scene_file)
+        media_dir = Path(scene_dir) / "output"
+        limits = limits_for_quality(quality, settings.manim_sandbox_limits)
 
         # Run Manim command
-        cmd = [
-            MANIM_EXECUTABLE,
-            scene_file,
-            scene_name,
-            "-qh",  # High quality
-            "-o", f"{scene_name}.mp4",
-            "--media_dir", os.path.join(scene_dir, "output")
-        ]
+        cmd = build_render_command(MANIM_EXECUTABLE, Path(scene_file), scene_name, media_dir, quality)
+        video_file = str(expected_video_path(media_dir, Path(scene_file), scene_name, quality))
 
         print(f"🎬 Rendering Manim scene: {' '.join(cmd)}")
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=180
-        )
+        if settings.manim_sandbox_enabled:
+            print(f"🔒 Sandbox limits: {limits}")
+            result = run_sandboxed(cmd, limits, scratch_root=os.path.join(MANIM_MEDIA_DIR, ".scratch"))
+        else:
+            completed = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=limits.wall_clock_seconds
+            )
+            result = {
+                "returncode": completed.returncode,
+                "stdout": completed.stdout,
+                "stderr": completed.stderr,
+                "limit_exceeded": None,
+            }
 
-        if result.returncode == 0:
-            # Find the output video
-            video_dir = os.path.join(scene_dir, "output", "videos", scene_name, quality)
-            video_file = os.path.join(video_dir, f"{scene_name}.mp4")
+        if result["limit_exceeded"]:
+            return {
+                "status": "error",
+                "message": f"Manim rendering stopped: {result['limit_exceeded']}",
+                "stdout": result["stdout"],
+                "stderr": result["stderr"]
+            }
 
+        if result["returncode"] == 0:
             if os.path.exists(video_file):
                 return {
                     "status": "success",
                     "video_path": video_file,
                     "message": "Scene rendered successfully"
                 }
-            else:
-                # Search for any mp4 file
-                for file in os.listdir(video_dir) if os.path.exists(video_dir) else []:
-                    if file.endswith('.mp4'):
-                        video_file = os.path.join(video_dir, file)
-                        return {
-                            "status": "success",
-                            "video_path": video_file,
-                            "message": "Scene rendered successfully"
-                        }
 
-                return {
-                    "status": "error",
-                    "message": f"Video file not found after rendering. Expected: {video_file}",
-                    "stdout": result.stdout,
-                    "stderr": result.stderr
-                }
+            return {
+                "status": "error",
+                "message": f"Video file not found after rendering. Expected: {video_file}",
+                "stdout": result["stdout"],
+                "stderr": result["stderr"]
+            }
         else:
             return {
                 "status": "error",
-                "message": f"Manim rendering failed with code {result.returncode}",
-                "stdout": result.stdout,
-                "stderr": result.stderr
+                "message": f"Manim rendering failed with code {result['returncode']}",
+                "stdout": result["stdout"],
+                "stderr": result["stderr"]
             }
 
-    except subprocess.TimeoutExpired:
+    except subprocess.TimeoutExpired as e:
         return {
             "status": "error",
-            "message": "Manim rendering timed out after 180 seconds"
+            "message": f"Manim rendering timed out after {e.timeout} seconds"
         }
     except Exception as e:
         return {
@@ -178,8 +265,112 @@ async def initialize_agent():
         max_tokens=8096,
     )
 
+def package_animation(video_path: str, scene_name: str) -> Optional[Dict[str, Any]]:
+    """Build the HLS ladder, poster and preview next to the rendered video"""
+    if not settings.manim_hls_enabled:
+        return None
+
+    print("📦 Packaging video for adaptive streaming...")
+    package_dir = os.path.join(MANIM_MEDIA_DIR, f"scene_{scene_name}", "package")
+    package = package_video(video_path, package_dir, ffmpeg_executable=settings.ffmpeg_executable)
+
+    if package["status"] == "error":
+        print(f"❌ Packaging failed: {package['errors']}")
+    else:
+        print(f"✅ Packaged {len(package['renditions'])} renditions ({package['status']})")
+    return package
+
+def upload_animation_to_gcp(video_path: str, package: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Upload the rendered video (and its HLS package, if any) to GCP Storage"""
+    upload = {
+        "public_video_url": None,
+        "gcp_upload_status": "skipped",
+        "hls_master_url": None,
+        "poster_url": None,
+        "preview_url": None,
+        "renditions": [],
+    }
+
+    if settings.gcp_bucket_name and settings.gcp_credentials_path:
+        try:
+            print(f"🚀 Uploading video to GCP Storage...")
+
+            # Create timestamp-based folder structure
+            current_date = datetime.now().strftime("%Y-%m-%d")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            folder_path = f"manim-animations/{current_date}/{timestamp}"
+
+            # Initialize uploader
+            uploader = GCPStorageUploader(
+                bucket_name=settings.gcp_bucket_name,
+                credentials_path=settings.gcp_credentials_path
+            )
+
+            # Upload video with public access
+            upload_result = uploader.upload_file(
+                file_path=video_path,
+                destination_blob_name="video.mp4",
+                make_public=True,
+                folder=folder_path
+            )
+
+            if upload_result:
+                upload["public_video_url"] = public_url(upload_result)
+                upload["gcp_upload_status"] = "success"
+                print(f"✅ Video uploaded successfully: {upload['public_video_url']}")
+            else:
+                upload["gcp_upload_status"] = "failed"
+                print(f"❌ Video upload failed")
+
+            # Upload the streaming package into the same folder
+            if package and package["status"] != "error":
+                package_urls = upload_package(uploader, package, folder_path)
+                upload.update({key: value for key, value in package_urls.items() if key != "failed_uploads"})
+                if package_urls["failed_uploads"]:
+                    print(f"⚠️ {package_urls['failed_uploads']} packaged files failed to upload")
+                print(f"✅ HLS master playlist: {upload['hls_master_url']}")
+
+        except Exception as e:
+            upload["gcp_upload_status"] = "failed"
+            print(f"❌ Error uploading video to GCP: {str(e)}")
+    else:
+        print(f"⚠️ GCP upload skipped - missing bucket name or credentials")
+
+    return upload
+
+async def generate_scene_code(scene_name: str, prompt: str) -> Tuple[str, Dict[str, Any]]:
+    """Ask Claude for scene code and validate it (with one optional repair pass)"""
+    user_prompt = f"Create a Manim scene class named '{scene_name}' that: {prompt}"
+
+    # Static rules first (system prefix), then the per-request scene name and prompt
+    messages = [
+        manim_system_message,
+        HumanMessage(content=user_prompt)
+    ]
+
+    print("🤖 Generating Manim code with Claude...")
+
+    # Get response from Claude
+    response = await manim_llm.ainvoke(messages)
+    prompt_cache_usage.record("manim", response)
+    print(f"✅ Received scene code ({len(response.content)} chars)")
+    scene_code = extract_scene_code(response.content)
+
+    # Validate before paying for a Manim process launch
+    validation = validate_scene_code(scene_code, scene_name)
+    if not validation["valid"] and settings.manim_validation_repair:
+        print(f"⚠️ Scene code failed validation, asking Claude for one repair pass:\n{format_validation_errors(validation)}")
+        scene_code = await repair_scene_code(scene_name, scene_code, validation)
+        validation = validate_scene_code(scene_code, scene_name)
+
+    return scene_code, validation
+
 async def generate_animation_for_api(prompt: str) -> Dict[str, Any]:
     """Generate animation from prompt for API use"""
+    return await animation_requests.do(SingleFlight.make_key(prompt), lambda: _generate_animation(prompt))
+
+async def _generate_animation(prompt: str) -> Dict[str, Any]:
+    """Uncoalesced generate_animation_for_api"""
     # Initialize agent if not already done
     if not manim_llm:
         await initialize_agent()
@@ -191,137 +382,94 @@ async def generate_animation_for_api(prompt: str) -> Dict[str, Any]:
     print(f"📝 User prompt: {prompt}")
 
     try:
-        # Create prompt for Claude to generate Manim code
-        system_prompt = """You are a Manim animation expert. Generate Python code for Manim animations following these rules:
+        # Common prompts are served from parameterized templates instead of Claude
+        template_match = match_template(prompt) if settings.manim_templates_enabled else None
 
-IMPORTANT GUIDELINES:
-- Import: from manim import *
-- NO MathTex() or LaTeX - use Text() instead
-- For multiple objects, position them using coordinates (e.g., UP, DOWN, LEFT, RIGHT)
-- Use clear timing with self.wait() between actions
-- Use all the shapes you know to generate real life objects, like use ellipse for clouds etc.
+        if template_match:
+            print(f"🧩 Prompt matched template '{template_match.template.name}' with params {template_match.params} (coverage {template_match.coverage:.0%})")
 
-POSITIONING TIPS:
-- Use UP, DOWN, LEFT, RIGHT, UL, UR, DL, DR for positioning
-- For multiple shapes: shape1.shift(LEFT*2), shape2.shift(RIGHT*2)
-- Use Transform() to morph one shape into another
-- Use Create() to draw objects, FadeIn/FadeOut for appearance
-
-EXAMPLE STRUCTURE:
-```python
-from manim import *
-
-class SceneName(Scene):
-    def construct(self):
-        # Create objects
-        circle = Circle().shift(LEFT*2)
-        square = Square().shift(RIGHT*2)
-
-        # Animate them
-        self.play(Create(circle))
-        self.wait(0.5)
-        self.play(Create(square))
-        self.wait(1)
-
-        # Transform or move
-        self.play(Transform(circle, square.copy().shift(LEFT*2)))
-        self.wait(2)
-```
-
-Always have supporting text in the scene. Return ONLY the Python code, no explanations."""
-
-        user_prompt = f"Create a Manim scene class named '{scene_name}' that: {prompt}"
-
-        messages = [
-            HumanMessage(content=f"{system_prompt}\n\n{user_prompt}")
-        ]
-
-        print("🤖 Generating Manim code with Claude...")
-
-        # Get response from Claude
-        response = await manim_llm.ainvoke(messages)
-        scene_code = response.content
-
-        print(f"✅ Received scene code ({len(scene_code)} chars)")
+            prerendered = template_variants.get(template_match)
+            if prerendered:
+                print(f"⚡ Serving pre-rendered variant: {template_match.variant_key}")
+                return {
+                    "scene_name": prerendered["scene_name"],
+                    "prompt": prompt,
+                    "agent_response": f"Served pre-rendered '{template_match.template.name}' template",
+                    "scene_code": prerendered["scene_code"],
+                    "video_path": prerendered["video_path"],
+                    "video_exists": bool(prerendered["video_path"]) and os.path.exists(prerendered["video_path"]),
+                    "public_video_url": prerendered.get("public_video_url"),
+                    "gcp_upload_status": "cached",
+                    "hls_master_url": prerendered.get("hls_master_url"),
+                    "poster_url": prerendered.get("poster_url"),
+                    "preview_url": prerendered.get("preview_url"),
+                    "renditions": prerendered.get("renditions", []),
+                    "generation_source": "template_prerendered",
+                    "template": template_match.template.name,
+                    "processing_status": "success"
+                }
 
-        # Extract Python code if wrapped in markdown
-        if "```python" in scene_code:
-            scene_code = scene_code.split("```python")[1].split("```")[0].strip()
-        elif "```" in scene_code:
-            scene_code = scene_code.split("```")[1].split("```")[0].strip()
+            scene_code = template_match.build_code(scene_name)
+            generation_source = "template"
+        else:
+            scene_code, validation = await generate_scene_code(scene_name, prompt)
+            generation_source = "llm"
 
-        # Ensure it has the import
-        if "from manim import" not in scene_code:
-            scene_code = "from manim import *\n\n" + scene_code
+            if not validation["valid"]:
+                print(f"❌ Scene code failed validation:\n{format_validation_errors(validation)}")
+                return {
+                    "scene_name": scene_name,
+                    "prompt": prompt,
+                    "agent_response": "Generated scene code failed validation",
+                    "scene_code": scene_code,
+                    "video_path": None,
+                    "video_exists": False,
+                    "public_video_url": None,
+                    "gcp_upload_status": "skipped",
+                    "generation_source": generation_source,
+                    "processing_status": "validation_error",
+                    "validation_errors": validation["errors"]
+                }
 
         print("📝 Creating scene file...")
         scene_file = create_manim_scene_code(scene_name, scene_code)
         print(f"✅ Scene file created: {scene_file}")
 
         print("🎬 Rendering scene...")
-        render_result = render_manim_scene(scene_file, scene_name)
+        # Render off the event loop so other requests keep flowing
+        render_result = await asyncio.to_thread(render_manim_scene, scene_file, scene_name)
 
         if render_result["status"] == "success":
             video_path = render_result["video_path"]
             print(f"✅ Video rendered: {video_path}")
 
-            # Upload to GCP if video exists
-            public_video_url = None
-            gcp_upload_status = "skipped"
-
-            if settings.gcp_bucket_name and settings.gcp_credentials_path:
-                try:
-                    print(f"🚀 Uploading video to GCP Storage...")
-
-                    # Create timestamp-based folder structure
-                    current_date = datetime.now().strftime("%Y-%m-%d")
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    folder_path = f"manim-animations/{current_date}/{timestamp}"
-
-                    # Initialize uploader
-                    uploader = GCPStorageUploader(
-                        bucket_name=settings.gcp_bucket_name,
-                        credentials_path=settings.gcp_credentials_path
-                    )
-
-                    # Upload video with public access
-                    upload_result = uploader.upload_file(
-                        file_path=video_path,
-                        destination_blob_name="video.mp4",
-                        make_public=True,
-                        folder=folder_path
-                    )
-
-                    if upload_result:
-                        if upload_result.startswith("gs://"):
-                            gs_parts = upload_result.replace("gs://", "").split("/", 1)
-                            bucket_name = gs_parts[0]
-                            file_path_gcp = gs_parts[1] if len(gs_parts) > 1 else ""
-                            public_video_url = f"https://storage.googleapis.com/{bucket_name}/{file_path_gcp}"
-                        else:
-                            public_video_url = upload_result
-
-                        gcp_upload_status = "success"
-                        print(f"✅ Video uploaded successfully: {public_video_url}")
-                    else:
-                        gcp_upload_status = "failed"
-                        print(f"❌ Video upload failed")
-
-                except Exception as e:
-                    gcp_upload_status = "failed"
-                    print(f"❌ Error uploading video to GCP: {str(e)}")
-            else:
-                print(f"⚠️ GCP upload skipped - missing bucket name or credentials")
+            package = await asyncio.to_thread(package_animation, video_path, scene_name)
+            upload = await asyncio.to_thread(upload_animation_to_gcp, video_path, package)
+
+            if template_match:
+                template_variants.put(template_match, {
+                    "scene_name": scene_name,
+                    "scene_code": scene_code,
+                    "video_path": video_path,
+                    **upload,
+                })
 
             return {
                 "scene_name": scene_name,
                 "prompt": prompt,
-                "agent_response": f"Scene created successfully with Claude",
+                "agent_response": f"Scene created successfully with {'template' if template_match else 'Claude'}",
                 "scene_code": scene_code,
                 "video_path": video_path,
                 "video_exists": True,
-                "public_video_url": public_video_url,
-                "gcp_upload_status": gcp_upload_status,
+                "public_video_url": upload["public_video_url"],
+                "gcp_upload_status": upload["gcp_upload_status"],
+                "hls_master_url": upload["hls_master_url"],
+                "poster_url": upload["poster_url"],
+                "preview_url": upload["preview_url"],
+                "renditions": upload["renditions"],
+                "packaging_status": package["status"] if package else "skipped",
+                "generation_source": generation_source,
+                "template": template_match.template.name if template_match else None,
                 "processing_status": "success"
             }
         else:
@@ -335,6 +483,7 @@ Always have supporting text in the scene. Return ONLY the Python code, no explan
                 "video_exists": False,
                 "public_video_url": None,
                 "gcp_upload_status": "skipped",
+                "generation_source": generation_source,
                 "processing_status": "error",
                 "error_details": render_result
             }
@@ -354,4 +503,40 @@ Always have supporting text in the scene. Return ONLY the Python code, no explan
             "processing_status": "error"
         }
 
-# This module now only contains the core agent logic for use by the API
\ No newline at end of file
+async def prerender_template_variants() -> List[Dict[str, Any]]:
+    """Render (and upload) the common parameter sets of every template ahead of time"""
+    rendered = []
+    for template in TEMPLATES:
+        for params in template.common_params:
+            match = TemplateMatch(template=template, params=params)
+            if template_variants.get(match):
+                print(f"⏭️ Already pre-rendered: {match.variant_key}")
+                continue
+
+            scene_name = f"Scene_{uuid.uuid4().hex[:6]}"
+            scene_code = match.build_code(scene_name)
+            scene_file = create_manim_scene_code(scene_name, scene_code)
+
+            print(f"🎬 Pre-rendering {match.variant_key} ({template.name} {params})")
+            render_result = render_manim_scene(scene_file, scene_name)
+            if render_result["status"] != "success":
+                print(f"❌ Pre-render failed for {match.variant_key}: {render_result['message']}")
+                continue
+
+            package = package_animation(render_result["video_path"], scene_name)
+            upload = upload_animation_to_gcp(render_result["video_path"], package)
+            variant = {
+                "scene_name": scene_name,
+                "scene_code": scene_code,
+                "video_path": render_result["video_path"],
+                **upload,
+            }
+            template_variants.put(match, variant)
+            rendered.append({"variant_key": match.variant_key, **variant})
+
+    return rendered
+
+# This module contains the core agent logic for use by the API.
+# Run it directly to pre-render the common template variants.
+if __name__ == "__main__":
+    asyncio.run(prerender_template_variants())
\ No newline at end of file
@@ -1,11 +1,79 @@
-from fastapi import APIRouter
+import importlib
+import json
+
+from typing import Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.core.lazy import LazyResource, load_or_503
+from app.utils.sse import SSE_HEADERS, format_sse_event
 from app.models.chat import ChatRequest, ChatResponse
-from app.agents.chat_agent.agent import get_chat_response
 
 router = APIRouter()
 
+# Imported on first use (or by pre-warming)
+chat_agent = LazyResource("chat", lambda: importlib.import_module("app.agents.chat_agent.agent"))
+
 @router.post("/", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     """Chat with the teaching assistant"""
-    response_text = get_chat_response(request.text)
-    return ChatResponse(response=response_text)
\ No newline at end of file
+    agent = await load_or_503(chat_agent)
+    response_text = await agent.get_chat_response(request.text)
+    return ChatResponse(response=response_text)
+
+@router.get("/metrics")
+async def chat_metrics():
+    """Per-route (fast / full model) call counts, latency percentiles and token usage"""
+    if not chat_agent.ready:
+        return {"status": "success", "routes": {}}
+    agent = await chat_agent.aget()
+    return {"status": "success", "routes": agent.route_metrics.stats()}
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the teaching assistant's answer as Server-Sent Events (`token` chunks, then `done`)"""
+    agent = await load_or_503(chat_agent)
+
+    async def event_stream():
+        async for event in agent.stream_chat_response(request.text):
+            yield format_sse_event(event['event'], event['data'])
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.websocket("/ws")
+async def chat_session(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Conversation with the teaching assistant that remembers earlier turns.
+
+    Connect with an optional `session_id` query parameter to resume. The
+    server first sends {"type": "session", "session_id"}; each
+    {"text": ...} message is answered with {"type": "token", "text"}
+    chunks and a final {"type": "done", ...} (or {"type": "error"}).
+    """
+    await websocket.accept()
+    try:
+        agent = await chat_agent.aget()
+    except Exception as e:
+        await websocket.send_json({"type": "error", "message": f"chat is not available: {str(e)}"})
+        await websocket.close(code=1011)
+        return
+
+    session = agent.chat_sessions.get_or_create(session_id)
+    await websocket.send_json({"type": "session", "session_id": session.session_id, "exchanges": session.exchanges})
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            text = message.get("text") if isinstance(message, dict) else None
+            text = text.strip() if isinstance(text, str) else ""
+            if not text:
+                await websocket.send_json({"type": "error", "message": "Send {\"text\": \"...\"}"})
+                continue
+            agent.chat_sessions.touch(session)
+            async for event in agent.stream_session_turn(session, text):
+                await websocket.send_json(dict(event['data'], type=event['event']))
+    except WebSocketDisconnect:
+        print(f"🔌 Chat session {session.session_id} disconnected after {session.exchanges} exchanges")
+
@@ -1,6 +1,10 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.models.response import MessageResponse
 from app.core.config import settings
+from app.core.database import pool_metrics
+from app.core.lazy import parse_names, readiness
+from app.services.rag.exemplar_bank import exemplar_bank
 
 router = APIRouter()
 
@@ -10,4 +14,29 @@ def health_check():
 
 @router.get("/config", response_model=MessageResponse)
 def get_config():
-    return MessageResponse(message=f"Dummy variable: {settings.dummy_variable}")
\ No newline at end of file
+    return MessageResponse(message=f"Dummy variable: {settings.dummy_variable}")
+
+@router.get("/db")
+def database_pool():
+    """Connection pool usage of the shared database engine"""
+    return {"status": "success", "pool": pool_metrics()}
+
+@router.get("/ready")
+def ready():
+    """
+    Warm state of each agent/service, the exemplar bank and the database pool.
+
+    503 until every agent listed in PREWARM_AGENTS has loaded; agents
+    nobody pre-warms are reported but load on their first request.
+    """
+    report = readiness(parse_names(settings.prewarm_agents))
+    failed = [name for name in report["required"] if report["subsystems"][name]["state"] == "failed"]
+    body = {
+        "status": "ready" if report["ready"] else ("failed" if failed else "warming"),
+        "required": report["required"],
+        "subsystems": report["subsystems"],
+        "exemplar_bank": {"enabled": settings.exemplar_bank_enabled, "loaded": exemplar_bank.loaded},
+        "database_pool": pool_metrics(),
+    }
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=body)
+
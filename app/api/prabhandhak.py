@@ -1,13 +1,37 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse
-from app.services.attendance.attendance_service import AttendanceService
-from app.agents.prabhandhak_agent.agent import PrabhandhakAgent
-from typing import Dict, Any
+from fastapi.responses import FileResponse, StreamingResponse
+from app.core.config import settings
+from app.core.lazy import LazyResource, load_or_503
+from app.utils.sse import SSE_HEADERS, format_sse_event
+from typing import Dict, Any, List
 import os
 
 router = APIRouter()
-attendance_service = AttendanceService()
-prabhandhak_agent = PrabhandhakAgent()
+
+
+def _create_attendance_service():
+    from app.services.attendance.attendance_service import AttendanceService
+    return AttendanceService()
+
+
+def _create_prabhandhak_agent():
+    from app.agents.prabhandhak_agent.agent import PrabhandhakAgent
+    return PrabhandhakAgent()
+
+
+def _check_ocr_image(image_bytes: bytes, filename: str = None):
+    """415 Unsupported Media Type for uploads the vision model can't be sent (e.g. HEIC without a decoder)"""
+    from app.services.ocr.preprocess import UnsupportedImageError, check_image_supported
+
+    try:
+        check_image_supported(image_bytes, allow_conversion=settings.ocr_preprocess_enabled)
+    except UnsupportedImageError as e:
+        raise HTTPException(status_code=415, detail=f"{filename}: {e}" if filename else str(e))
+
+
+# Built on first use (or by pre-warming) - face encodings and RAG clients are slow to load
+attendance_service = LazyResource("attendance", _create_attendance_service)
+prabhandhak_agent = LazyResource("prabhandhak", _create_prabhandhak_agent)
 
 @router.post("/attendance/upload-photo")
 async def upload_photo(
@@ -18,8 +42,9 @@ async def upload_photo(
     if not photo.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
+    service = await load_or_503(attendance_service)
     try:
-        result = await attendance_service.process_attendance_photo(photo, class_id)
+        result = await service.process_attendance_photo(photo, class_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing photo: {str(e)}")
@@ -48,12 +73,45 @@ async def process_image_ocr(
     if not photo.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
+    # Read image bytes
+    image_bytes = await photo.read()
+    _check_ocr_image(image_bytes)
+
+    agent = await load_or_503(prabhandhak_agent)
     try:
-        # Read image bytes
-        image_bytes = await photo.read()
-        
         # Process with OCR agent
-        result = await prabhandhak_agent.process_image_ocr(image_bytes)
+        result = await agent.process_image_ocr(image_bytes)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing image for OCR: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing image for OCR: {str(e)}")
+
+
+@router.post("/ocr/process-batch")
+async def process_batch_ocr(
+    photos: List[UploadFile] = File(...)
+):
+    """
+    OCR several textbook pages and generate one question set for all of them.
+
+    Streams Server-Sent Events: a `page` event per page as it is transcribed,
+    then `questions` for the combined text and a final `done` (or `error`).
+    """
+    if len(photos) > settings.ocr_batch_max_pages:
+        raise HTTPException(status_code=400, detail=f"At most {settings.ocr_batch_max_pages} pages per batch")
+    for photo in photos:
+        if not photo.content_type or not photo.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail=f"File must be an image: {photo.filename}")
+
+    # Read every upload before streaming starts - the files are closed once this handler returns
+    pages = [(photo.filename, await photo.read()) for photo in photos]
+    for filename, image_bytes in pages:
+        _check_ocr_image(image_bytes, filename)
+
+    agent = await load_or_503(prabhandhak_agent)
+
+    async def event_stream():
+        async for event in agent.stream_batch_ocr(pages):
+            yield format_sse_event(event['event'], event['data'])
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
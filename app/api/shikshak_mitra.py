@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any
 import os
@@ -7,6 +7,9 @@ import sys
 import asyncio
 from pathlib import Path
 
+from app.core.lazy import LazyResource, load_or_503
+from app.utils.sse import SSE_HEADERS, format_sse_event
+
 # Add the manim agent to the path
 current_dir = Path(__file__).parent
 project_root = current_dir.parent
@@ -17,28 +20,18 @@ sys.path.append(str(agent_path))
 shikshak_agent_path = project_root / "agents" / "shikshak_mitra"
 sys.path.append(str(shikshak_agent_path))
 
-# Import manim agent functions
-try:
+def _load_agent_module(name, path):
+    """Execute an agent file (its directory isn't an importable package name)"""
     import importlib.util
-    manim_spec = importlib.util.spec_from_file_location("manim_agent", agent_path / "agent.py")
-    manim_module = importlib.util.module_from_spec(manim_spec)
-    manim_spec.loader.exec_module(manim_module)
-    generate_animation_for_api = manim_module.generate_animation_for_api
-    extract_video_path = manim_module.extract_video_path
-except Exception as e:
-    print(f"Warning: Could not import manim agent: {e}")
-    generate_animation_for_api = None
-    extract_video_path = None
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
-# Import shikshak mitra agent functions
-try:
-    shikshak_spec = importlib.util.spec_from_file_location("shikshak_agent", shikshak_agent_path / "agent.py")
-    shikshak_module = importlib.util.module_from_spec(shikshak_spec)
-    shikshak_spec.loader.exec_module(shikshak_module)
-    invoke_shikshak_agent = shikshak_module.invoke_shikshak_agent
-except Exception as e:
-    print(f"Warning: Could not import shikshak mitra agent: {e}")
-    invoke_shikshak_agent = None
+# Agent modules run on first use (or by pre-warming): Shikshak Mitra's module
+# body initializes Vertex AI, Firestore and the embedding model
+manim_agent = LazyResource("manim", lambda: _load_agent_module("manim_agent", agent_path / "agent.py"))
+shikshak_agent = LazyResource("shikshak_mitra", lambda: _load_agent_module("shikshak_agent", shikshak_agent_path / "agent.py"))
 
 router = APIRouter()
 
@@ -47,15 +40,15 @@ class AnimationRequest(BaseModel):
 
 class ShikshakMitraRequest(BaseModel):
     question: str
+    fresh: bool = False  # Skip the semantic cache and generate new questions
 
 @router.post("/generation-questions")
 async def generation_questions(request: ShikshakMitraRequest) -> Dict[str, Any]:
     """Generate questions using Shikshak Mitra agent with enhanced RAG and in-context learning"""
-    if not invoke_shikshak_agent:
-        raise HTTPException(status_code=500, detail="Shikshak Mitra agent not available")
+    shikshak_module = await load_or_503(shikshak_agent)
     
     try:
-        structured_response = await invoke_shikshak_agent(request.question)
+        structured_response = await shikshak_module.invoke_shikshak_agent(request.question, fresh=request.fresh)
         
         # Check if we got a structured JSON response or fallback response
         if "parse_error" in structured_response:
@@ -74,14 +67,24 @@ async def generation_questions(request: ShikshakMitraRequest) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error invoking Shikshak Mitra agent: {str(e)}")
 
+@router.post("/generation-questions/stream")
+async def generation_questions_stream(request: ShikshakMitraRequest):
+    """Stream generated questions as Server-Sent Events, one `question` event per question_N"""
+    shikshak_module = await load_or_503(shikshak_agent)
+
+    async def event_stream():
+        async for event in shikshak_module.stream_shikshak_agent(request.question, fresh=request.fresh):
+            yield format_sse_event(event['event'], event['data'])
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/generate-animation")
 async def generate_animation(request: AnimationRequest) -> Dict[str, Any]:
     """Generate Manim animation from text prompt and return metadata"""
-    if not generate_animation_for_api:
-        raise HTTPException(status_code=500, detail="Manim agent not available")
+    manim_module = await load_or_503(manim_agent)
     
     try:
-        result = await generate_animation_for_api(request.prompt)
+        result = await manim_module.generate_animation_for_api(request.prompt)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating animation: {str(e)}")
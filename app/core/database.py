@@ -0,0 +1,58 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import settings
+
+_engine: Optional[AsyncEngine] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    The process-wide async database engine.
+
+    Created on first use and shared by every agent, so pooled connections
+    (and the prepared statements cached on them) survive across requests.
+    Only dispose_engine() at application shutdown closes it.
+    """
+    global _engine
+    if _engine is None:
+        url = make_url(settings.database_url)
+        if url.drivername == "postgresql+asyncpg":
+            # SQLAlchemy's per-connection cache of asyncpg prepared statements
+            url = url.update_query_dict({"prepared_statement_cache_size": str(settings.db_statement_cache_size)})
+
+        _engine = create_async_engine(
+            url,
+            echo=False,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+        print(f"🗄️  Database engine created (pool {settings.db_pool_size} + {settings.db_max_overflow} overflow)")
+    return _engine
+
+
+async def dispose_engine():
+    """Close every pooled connection - application shutdown only"""
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        print("🔒 Database connections closed")
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """Current connection pool usage"""
+    if _engine is None:
+        return {"created": False}
+    pool = _engine.pool
+    metrics: Dict[str, Any] = {"created": True, "pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            metrics[name] = getattr(pool, name)()
+    metrics["max_overflow"] = settings.db_max_overflow
+    return metrics
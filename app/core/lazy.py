@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+COLD = "cold"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class LazyResource:
+    """
+    A heavy object (agent, service, client) created on first use.
+
+    The factory runs at most once at a time; a failed load is recorded and
+    retried on the next use, so one missing credential only breaks the
+    routes that need it. aget() runs the factory in a worker thread so the
+    event loop keeps serving other routes while an agent initializes.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Args:
+            name: Subsystem name reported by /health/ready
+            factory: Zero-argument callable that builds the resource
+        """
+        self.name = name
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self.state = COLD
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self.attempts = 0
+        lazy_resources[name] = self
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def get(self) -> Any:
+        """The resource, building it now if needed (blocking)"""
+        if self.state == READY:
+            return self._value
+        with self._lock:
+            if self.state == READY:
+                return self._value
+            self.state = LOADING
+            self.attempts += 1
+            started = time.perf_counter()
+            print(f"⏳ Loading {self.name}...")
+            try:
+                value = self.factory()
+            except Exception as e:
+                self.state = FAILED
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"❌ Could not load {self.name}: {self.error}")
+                raise
+            self._value = value
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.loaded_at = time.time()
+            self.error = None
+            self.state = READY
+            print(f"✅ {self.name} ready in {self.load_seconds:.2f}s")
+            return value
+
+    async def aget(self) -> Any:
+        """The resource, building it in a worker thread if needed"""
+        if self.state == READY:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "loaded_at": self.loaded_at,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+async def load_or_503(resource: LazyResource) -> Any:
+    """The resource for a route handler, or 503 Service Unavailable if it can't be initialized"""
+    try:
+        return await resource.aget()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"{resource.name} is not available: {str(e)}")
+
+
+# Every lazy resource in the process, by name
+lazy_resources: Dict[str, LazyResource] = {}
+
+
+def parse_names(names: str) -> List[str]:
+    """Comma-separated subsystem names; "all" selects every registered resource"""
+    selected = [name.strip() for name in names.split(",") if name.strip()]
+    if "all" in selected:
+        return list(lazy_resources)
+    return selected
+
+
+async def prewarm(names: Iterable[str]):
+    """Load the named resources one after another in the background, logging failures"""
+    for name in names:
+        resource = lazy_resources.get(name)
+        if resource is None:
+            print(f"⚠️  Unknown subsystem to pre-warm: {name} (known: {', '.join(lazy_resources)})")
+            continue
+        try:
+            await resource.aget()
+        except Exception:
+            pass  # Already recorded on the resource; requests will retry
+
+
+def readiness(required: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Warm state of every lazy subsystem.
+
+    Returns:
+        {"ready": bool, "subsystems": {...}} - ready when every required
+        subsystem has loaded (cold ones that nobody asked to pre-warm don't count)
+    """
+    required = [name for name in required if name in lazy_resources]
+    subsystems = {name: resource.status() for name, resource in lazy_resources.items()}
+    return {
+        "ready": all(lazy_resources[name].ready for name in required),
+        "required": required,
+        "subsystems": subsystems,
+    }
@@ -1,17 +1,37 @@
 #!/usr/bin/env python3
 
 import os
+import sys
+import json
 import tempfile
-import subprocess
 from pathlib import Path
 from fastmcp import FastMCP
 
+# Allow `python app/mcp/manim_mcp.py` to import from the app package
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.services.manim.scene_validator import validate_scene_code, format_validation_errors
+from app.services.manim.render_jobs import RenderJob, RenderJobManager, build_render_command, expected_video_path
+from app.services.manim.sandbox import limits_for_quality
+
 mcp = FastMCP("Manim Animation Server")
 
 MANIM_EXECUTABLE = os.getenv("MANIM_EXECUTABLE", "manim")
-BASE_DIR = Path(__file__).parent / "media"
+BASE_DIR = Path(__file__).resolve().parent / "media"
 BASE_DIR.mkdir(exist_ok=True)
 
+RENDER_QUALITY = os.getenv("MANIM_RENDER_QUALITY", "h")
+RENDER_TIMEOUT = int(os.getenv("MANIM_RENDER_TIMEOUT", "300"))  # 5 minute timeout, when unsandboxed
+SANDBOX_ENABLED = os.getenv("MANIM_SANDBOX_ENABLED", "true").lower() not in ("0", "false", "no")
+# Per-quality overrides as JSON, e.g. {"h": {"memory_mb": 4096, "wall_clock_seconds": 300}}
+SANDBOX_LIMITS = json.loads(os.getenv("MANIM_SANDBOX_LIMITS", "{}"))
+
+# Bounded pool so concurrent clients can render in parallel without starving the host
+render_jobs = RenderJobManager(
+    max_workers=int(os.getenv("MANIM_RENDER_WORKERS", "2")),
+    max_pending=int(os.getenv("MANIM_RENDER_MAX_PENDING", "16")),
+)
+
 @mcp.tool()
 def create_scene(scene_name: str, scene_code: str) -> str:
     """
@@ -38,10 +58,35 @@ def create_scene(scene_name: str, scene_code: str) -> str:
     
     return f"✅ Scene '{scene_name}' created successfully at {scene_file}"
 
+def _submit_scene_render(scene_name: str) -> RenderJob:
+    """Validate a created scene and queue it on the render pool"""
+    scene_dir = BASE_DIR / f"scene_{scene_name}"
+    scene_file = scene_dir / f"{scene_name}.py"
+    
+    if not scene_file.exists():
+        raise FileNotFoundError(f"Scene '{scene_name}' not found. Create it first using create_scene.")
+    
+    # Fail fast instead of launching Manim on code that can't render
+    validation = validate_scene_code(scene_file.read_text(), scene_name)
+    if not validation["valid"]:
+        raise ValueError(f"Scene failed validation, not rendering:\n{format_validation_errors(validation)}")
+    
+    media_dir = scene_dir / "output"
+    return render_jobs.submit(
+        scene_name=scene_name,
+        command=build_render_command(MANIM_EXECUTABLE, scene_file, scene_name, media_dir, RENDER_QUALITY),
+        cwd=str(scene_dir),
+        artifact_path=str(expected_video_path(media_dir, scene_file, scene_name, RENDER_QUALITY)),
+        timeout=RENDER_TIMEOUT,
+        limits=limits_for_quality(RENDER_QUALITY, SANDBOX_LIMITS) if SANDBOX_ENABLED else None,
+        scratch_root=str(BASE_DIR / ".scratch"),
+    )
+
 @mcp.tool()
 def render_scene(scene_name: str) -> str:
     """
-    Render a Manim scene to video.
+    Render a Manim scene to video and wait for it to finish.
+    Prefer submit_render + render_status for long renders.
     
     Args:
         scene_name: Name of the scene to render
@@ -49,85 +94,93 @@ def render_scene(scene_name: str) -> str:
     Returns:
         Success message with video path or error details
     """
-    scene_dir = BASE_DIR / f"scene_{scene_name}"
-    scene_file = scene_dir / f"{scene_name}.py"
-    
-    if not scene_file.exists():
-        return f"❌ Error: Scene '{scene_name}' not found. Create it first using create_scene."
-    
     try:
-        # Run manim render command
-        cmd = [
-            MANIM_EXECUTABLE,
-            "render",
-            str(scene_file),
-            scene_name,
-            "--media_dir", str(scene_dir / "output")
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=str(scene_dir)
-        )
+        job = _submit_scene_render(scene_name)
+        render_jobs.wait(job.job_id)
         
-        if result.returncode == 0:
-            # Find the generated video
-            output_dir = scene_dir / "output"
-            video_files = list(output_dir.glob(f"**/*{scene_name}*.mp4"))
-            
-            if video_files:
-                video_path = video_files[0]
-                return f"✅ Scene '{scene_name}' rendered successfully!\n📹 Video: {video_path}"
-            else:
-                return f"⚠️ Render completed but no video found.\n📋 Output:\n{result.stdout}"
-        else:
-            return f"❌ Manim render failed!\n📋 Error:\n{result.stderr}"
+        if job.status == "succeeded":
+            return f"✅ Scene '{scene_name}' rendered successfully!\n📹 Video: {job.artifact_path}"
+        return f"❌ Manim render failed! {job.error}\n📋 Error:\n{job.stderr or ''}"
             
-    except subprocess.TimeoutExpired:
-        return f"❌ Render timeout! Animation took longer than 5 minutes."
+    except (FileNotFoundError, ValueError) as e:
+        return f"❌ Error: {str(e)}"
     except Exception as e:
         return f"❌ Unexpected error: {str(e)}"
 
 @mcp.tool()
-def validate_scene(scene_code: str) -> str:
+def submit_render(scene_name: str) -> str:
+    """
+    Queue a Manim scene for rendering and return immediately.
+    
+    Args:
+        scene_name: Name of the scene to render (must be created first)
+        
+    Returns:
+        JSON with the job_id to poll and the path the video will be written to
+    """
+    try:
+        job = _submit_scene_render(scene_name)
+        return json.dumps(job.to_dict())
+    except Exception as e:
+        return json.dumps({"status": "error", "scene_name": scene_name, "error": str(e)})
+
+@mcp.tool()
+def render_status(job_id: str) -> str:
+    """
+    Check on a render submitted with submit_render.
+    
+    Args:
+        job_id: Job id returned by submit_render
+        
+    Returns:
+        JSON with status (queued, running, succeeded, failed, cancelled) and artifact path
+    """
+    job = render_jobs.get(job_id)
+    if job is None:
+        return json.dumps({"status": "error", "job_id": job_id, "error": "Unknown job id"})
+    return json.dumps(job.to_dict())
+
+@mcp.tool()
+def cancel_render(job_id: str) -> str:
+    """
+    Cancel a queued render or stop a running one.
+    
+    Args:
+        job_id: Job id returned by submit_render
+        
+    Returns:
+        JSON with the job's final status
+    """
+    job = render_jobs.cancel(job_id)
+    if job is None:
+        return json.dumps({"status": "error", "job_id": job_id, "error": "Unknown job id"})
+    return json.dumps(job.to_dict())
+
+@mcp.tool()
+def validate_scene(scene_code: str, scene_name: str = "") -> str:
     """
     Validate Manim scene code for syntax and structure.
     
     Args:
         scene_code: Python code to validate
+        scene_name: Expected scene class name (optional)
         
     Returns:
         Validation result with any issues found
     """
     try:
-        # Add imports for compilation check
+        # Add imports for the undefined-name check
         if "from manim import *" not in scene_code and "import manim" not in scene_code:
-            full_code = "from manim import *\n\n" + scene_code
-        else:
-            full_code = scene_code
-            
-        # Try to compile the code
-        compile(full_code, '<string>', 'exec')
+            scene_code = "from manim import *\n\n" + scene_code
         
-        # Basic structural checks
-        issues = []
-        if "class" not in scene_code:
-            issues.append("Missing class definition")
-        if "Scene" not in scene_code:
-            issues.append("Should inherit from Scene")
-        if "def construct(self)" not in scene_code:
-            issues.append("Missing construct() method")
+        validation = validate_scene_code(scene_code, scene_name or None)
         
-        if issues:
-            return f"⚠️ Syntax OK, but potential issues:\n" + "\n".join(f"• {issue}" for issue in issues)
-        else:
-            return "✅ Scene code looks good!"
+        if not validation["valid"]:
+            return f"❌ Scene code has problems:\n" + format_validation_errors(validation)
+        if validation["warnings"]:
+            return f"⚠️ Scene code looks good, but:\n" + "\n".join(f"• {issue['message']}" for issue in validation["warnings"])
+        return "✅ Scene code looks good!"
             
-    except SyntaxError as e:
-        return f"❌ Syntax error on line {e.lineno}: {e.msg}"
     except Exception as e:
         return f"❌ Validation error: {str(e)}"
 
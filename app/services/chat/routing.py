@@ -0,0 +1,126 @@
+import re
+import statistics
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+FAST = "fast"
+FULL = "full"
+
+# "what is 7 x 8?", "calculate 125 / 5", "12+30="
+_ARITHMETIC = re.compile(
+    r"^(?:(?:what\s+is|what's|calculate|solve|find|compute)\s+)?"
+    r"[\d\s.,()+\-*/x×÷^=]*\d[\d\s.,()+\-*/x×÷^=]*(?:\?)?$",
+    re.IGNORECASE,
+)
+
+# Short look-up questions: definitions, one-word facts, counts
+_LOOKUP = re.compile(
+    r"^(?:what|who|where|when|which)\s+(?:is|are|was|were)\s+(?:a|an|the)?\s*[\w\s'-]{1,40}\??$"
+    r"|^(?:what\s+is\s+)?(?:the\s+)?(?:meaning|opposite|plural|synonym|antonym|spelling|capital)\s+of\s+[\w\s'-]{1,40}\??$"
+    r"|^how\s+many\s+[\w\s'-]{1,40}\??$",
+    re.IGNORECASE,
+)
+
+_SPELLING = re.compile(r"^how\s+(?:do\s+you|to)\s+spell\s+[\w'-]+\??$", re.IGNORECASE)
+
+# Requests for reasoning or longer writing (whole words: "plan" must not match "plants")
+_COMPLEX_KEYWORDS = re.compile(
+    r"\b(?:explain\w*|why|how\s+(?:does|do|did)|compare|difference|describe|essay|story|poem|paragraph|letter"
+    r"|summar\w*|step\s+by\s+step|steps|prove|reason\w*|examples|write|create|plan|help\s+me\s+understand|word\s+problem)\b",
+    re.IGNORECASE,
+)
+
+# Subjects where even short questions usually need an explanation
+_EXPLANATORY_SUBJECTS = ("photosynthesis", "fraction", "gravity", "digestion", "evaporation", "democracy", "ecosystem")
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    confidence: float
+    reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"route": self.route, "confidence": self.confidence, "reasons": self.reasons}
+
+
+def classify_question(text: str) -> RouteDecision:
+    """
+    Cheap local guess whether a question needs the full model.
+
+    Uses length, question shape (arithmetic, short look-ups) and keywords
+    that ask for reasoning or longer writing. Confidence is how sure the
+    heuristics are; callers send low-confidence "fast" decisions to the
+    full model.
+    """
+    normalized = " ".join(text.split())
+    lowered = normalized.lower()
+    words = len(normalized.split())
+    reasons = [f"{words} words"]
+
+    complex_hits = list(dict.fromkeys(" ".join(match.split()) for match in _COMPLEX_KEYWORDS.findall(lowered)))
+    subject_hits = [subject for subject in _EXPLANATORY_SUBJECTS if subject in lowered]
+
+    if words > 40 or normalized.count("?") > 1 or "\n" in text.strip():
+        return RouteDecision(FULL, 0.9, reasons + ["long or multi-part"])
+    if _SPELLING.match(lowered):
+        return RouteDecision(FAST, 0.9, reasons + ["spelling"])
+    if complex_hits:
+        return RouteDecision(FULL, 0.85, reasons + [f"asks for reasoning: {', '.join(complex_hits[:3])}"])
+    if _ARITHMETIC.match(lowered):
+        return RouteDecision(FAST, 0.95, reasons + ["arithmetic"])
+    if subject_hits:
+        return RouteDecision(FULL, 0.7, reasons + [f"explanatory subject: {', '.join(subject_hits)}"])
+    if _LOOKUP.match(lowered) and words <= 10:
+        return RouteDecision(FAST, 0.85, reasons + ["short look-up"])
+    if words <= 6:
+        return RouteDecision(FAST, 0.6, reasons + ["short, no clear shape"])
+    return RouteDecision(FULL, 0.6, reasons + ["no simple pattern"])
+
+
+class RouteMetrics:
+    """Per-route call counts, latency percentiles, token usage and escalations"""
+
+    def __init__(self, window: int = 500):
+        """
+        Args:
+            window: Recent latencies kept per route for the percentiles
+        """
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._totals: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, latency_seconds: float, message=None, escalated: bool = False):
+        """
+        Record one model call.
+
+        Args:
+            route: Route that made the call ("fast" or "full")
+            latency_seconds: Wall-clock time of the call
+            message: The AIMessage returned by the model (for token usage)
+            escalated: Whether this (fast) answer was discarded and retried on the full model
+        """
+        usage = getattr(message, "usage_metadata", None) or {}
+        with self._lock:
+            self._latencies[route].append(latency_seconds)
+            totals = self._totals[route]
+            totals["calls"] += 1
+            totals["input_tokens"] += usage.get("input_tokens") or 0
+            totals["output_tokens"] += usage.get("output_tokens") or 0
+            totals["escalations"] += 1 if escalated else 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            report = {}
+            for route, totals in self._totals.items():
+                latencies = sorted(self._latencies[route])
+                calls = totals["calls"]
+                report[route] = dict(
+                    totals,
+                    latency_p50_ms=round(statistics.median(latencies) * 1000) if latencies else None,
+                    latency_p95_ms=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000) if latencies else None,
+                    avg_output_tokens=round(totals["output_tokens"] / calls, 1) if calls else 0.0,
+                )
+            return report
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.rag.context_assembly import estimate_tokens
+
+
+class ChatSession:
+    """One student's conversation: recent turns verbatim, older ones as a short digest"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns: List[Tuple[str, str]] = []  # (role, text) with role "human" / "ai"
+        self.turn_tokens: List[int] = []
+        self.digest: List[str] = []  # One line per dropped exchange
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        self.exchanges = 0
+        self.trims = 0
+        # One turn at a time per session (a second message waits for the answer to the first)
+        self.lock = asyncio.Lock()
+
+    @property
+    def history_tokens(self) -> int:
+        return sum(self.turn_tokens)
+
+    def add_exchange(self, question: str, answer: str):
+        self.turns += [("human", question), ("ai", answer)]
+        self.turn_tokens += [estimate_tokens(question), estimate_tokens(answer)]
+        self.exchanges += 1
+        self.last_active = time.monotonic()
+
+    def trim(self, token_budget: int, low_watermark: float, digest_token_budget: int) -> bool:
+        """
+        Keep the history within token_budget.
+
+        Once over budget, whole exchanges are dropped oldest first until the
+        history is below low_watermark * token_budget, so the (prompt-cached)
+        history prefix then stays unchanged for several turns. Each dropped
+        exchange leaves a one-line digest of the student's question.
+
+        Returns:
+            True if anything was dropped
+        """
+        if self.history_tokens <= token_budget:
+            return False
+        target = int(token_budget * low_watermark)
+        while self.turns and self.history_tokens > target:
+            dropped = self.turns[:2]
+            self.turns = self.turns[2:]
+            self.turn_tokens = self.turn_tokens[2:]
+            question = next((text for role, text in dropped if role == "human"), "")
+            if question:
+                self.digest.append(" ".join(question.split())[:160])
+
+        # Oldest digest lines go first
+        while self.digest and estimate_tokens("\n".join(self.digest)) > digest_token_budget:
+            self.digest.pop(0)
+        self.trims += 1
+        return True
+
+    def digest_text(self) -> str:
+        if not self.digest:
+            return ""
+        return "Earlier in this conversation the student asked about:\n" + "\n".join(f"- {line}" for line in self.digest)
+
+
+class ChatSessionStore:
+    """
+    In-memory chat sessions with idle eviction and a session cap.
+
+    Sessions idle longer than idle_seconds are dropped on access; past
+    max_sessions the least recently active one goes first.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_seconds: float = 1800):
+        """
+        Args:
+            max_sessions: Sessions kept in memory
+            idle_seconds: Inactivity after which a session is evicted
+        """
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.resumed = 0
+        self.evicted = 0
+
+    def _evict(self):
+        """Drop idle sessions and enforce the cap (caller holds the lock)"""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_active <= self.idle_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        """Resume a live session, or start a new one (with the given id if it has expired)"""
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                self.resumed += 1
+            else:
+                session = ChatSession(session_id or uuid.uuid4().hex)
+                self._sessions[session.session_id] = session
+                self.created += 1
+            session.last_active = time.monotonic()
+            self._sessions.move_to_end(session.session_id)
+            self._evict()
+            return session
+
+    def touch(self, session: ChatSession):
+        with self._lock:
+            session.last_active = time.monotonic()
+            if session.session_id in self._sessions:
+                self._sessions.move_to_end(session.session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict()
+            return {
+                "active": len(self._sessions),
+                "created": self.created,
+                "resumed": self.resumed,
+                "evicted": self.evicted,
+            }
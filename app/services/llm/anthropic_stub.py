@@ -0,0 +1,169 @@
+"""
+Local stand-in for the Anthropic Messages API that records request payloads.
+
+Point the agents at it to check prompt structure and cache breakpoints
+without calling Claude:
+
+    uvicorn app.services.llm.anthropic_stub:app --port 8089
+    ANTHROPIC_BASE_URL=http://localhost:8089 uvicorn main:app --port 4002
+
+Recorded payloads are available at GET /payloads (and appended to the
+file in ANTHROPIC_STUB_LOG, if set). Prompt caching is simulated: a
+request whose prefix up to its last cache_control breakpoint was seen
+before (at a breakpoint, or up to 20 blocks earlier) reports those
+tokens as cache reads, and the rest of the prefix as cache writes.
+Breakpoints on prefixes below the API's caching minimum are ignored.
+"""
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.services.llm.prompt_caching import is_cacheable
+from app.services.rag.context_assembly import estimate_tokens
+from app.utils.sse import format_sse_event
+
+DEFAULT_REPLY = os.getenv("ANTHROPIC_STUB_REPLY", '{"stub": "Hello from the Anthropic stub"}')
+
+app = FastAPI(title="Anthropic API stub")
+
+# Block boundaries before a breakpoint that are checked for an earlier cache entry
+LOOKBACK_BLOCKS = 20
+
+payloads: List[Dict[str, Any]] = []
+_seen_prefixes = set()
+
+
+def _blocks(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Prompt content blocks in cache order: tools, system, then messages"""
+    blocks = list(payload.get("tools") or [])
+    system = payload.get("system")
+    if isinstance(system, str):
+        blocks.append({"type": "text", "text": system})
+    elif system:
+        blocks.extend(system)
+    for message in payload.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            blocks.append({"type": "text", "text": content})
+        else:
+            blocks.extend(content or [])
+    return blocks
+
+
+def _block_tokens(block: Dict[str, Any]) -> int:
+    return estimate_tokens(block.get("text") or json.dumps(block))
+
+
+def simulate_usage(payload: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Usage the real API would report, with cache reads for previously seen prefixes.
+
+    Like the API, each cache_control breakpoint writes the prefix ending
+    there, and a lookup also matches prefixes cached at up to
+    LOOKBACK_BLOCKS earlier block boundaries (how growing conversations
+    hit the previous turn's cache).
+    """
+    blocks = _blocks(payload)
+    # Like the API, breakpoints on prefixes too short to cache do nothing
+    breakpoints = [
+        i for i, block in enumerate(blocks)
+        if isinstance(block, dict) and block.get("cache_control")
+        and is_cacheable(sum(_block_tokens(earlier) for earlier in blocks[:i + 1]))
+    ]
+
+    total = sum(_block_tokens(block) for block in blocks)
+    if not breakpoints:
+        return {"input_tokens": total, "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+
+    def prefix_key(end: int):
+        # Cached content, not where the markers sit (a later turn moves the breakpoint)
+        content = [{k: v for k, v in block.items() if k != "cache_control"} for block in blocks[:end + 1]]
+        return (payload.get("model"), json.dumps(content, sort_keys=True))
+
+    read_end = -1
+    for breakpoint in breakpoints:
+        for end in range(breakpoint, max(breakpoint - LOOKBACK_BLOCKS, -1), -1):
+            if prefix_key(end) in _seen_prefixes:
+                read_end = max(read_end, end)
+                break
+    for breakpoint in breakpoints:
+        _seen_prefixes.add(prefix_key(breakpoint))
+
+    last = breakpoints[-1]
+    read_tokens = sum(_block_tokens(block) for block in blocks[:read_end + 1])
+    write_tokens = sum(_block_tokens(block) for block in blocks[read_end + 1:last + 1])
+    return {
+        "input_tokens": total - read_tokens - write_tokens,
+        "cache_read_input_tokens": read_tokens,
+        "cache_creation_input_tokens": write_tokens,
+    }
+
+
+def _record(payload: Dict[str, Any]):
+    payloads.append(payload)
+    log_path = os.getenv("ANTHROPIC_STUB_LOG")
+    if log_path:
+        with open(log_path, "a") as f:
+            f.write(json.dumps(payload) + "\n")
+
+
+def _stream_events(message: Dict[str, Any], text: str) -> Tuple[str, ...]:
+    usage = message["usage"]
+    start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+    events = [
+        format_sse_event("message_start", {"type": "message_start", "message": start}),
+        format_sse_event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}),
+    ]
+    for i in range(0, len(text), 16):
+        events.append(format_sse_event("content_block_delta", {
+            "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[i:i + 16]},
+        }))
+    events += [
+        format_sse_event("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        format_sse_event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": usage,  # Cumulative, including cache fields, as the real API reports
+        }),
+        format_sse_event("message_stop", {"type": "message_stop"}),
+    ]
+    return tuple(events)
+
+
+@app.post("/v1/messages")
+async def create_message(request: Request):
+    payload = await request.json()
+    _record(payload)
+
+    usage = simulate_usage(payload)
+    usage["output_tokens"] = estimate_tokens(DEFAULT_REPLY)
+    message = {
+        "id": f"msg_stub_{uuid.uuid4().hex[:12]}",
+        "type": "message",
+        "role": "assistant",
+        "model": payload.get("model", "stub"),
+        "content": [{"type": "text", "text": DEFAULT_REPLY}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": usage,
+    }
+
+    if payload.get("stream"):
+        return StreamingResponse(iter(_stream_events(message, DEFAULT_REPLY)), media_type="text/event-stream")
+    return message
+
+
+@app.get("/payloads")
+async def list_payloads():
+    return payloads
+
+
+@app.delete("/payloads")
+async def clear_payloads():
+    payloads.clear()
+    _seen_prefixes.clear()
+    return {"status": "cleared"}
@@ -0,0 +1,117 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from langchain_core.messages import SystemMessage
+
+from app.services.rag.context_assembly import estimate_tokens
+
+# Anthropic ignores cache_control on prefixes shorter than this (Sonnet / Opus)
+MIN_CACHEABLE_TOKENS = 1024
+
+# Input price multipliers relative to uncached input tokens (5-minute cache)
+CACHE_READ_PRICE = 0.1
+CACHE_WRITE_PRICE = 1.25
+
+
+def is_cacheable(prefix_tokens: int) -> bool:
+    """Whether a prompt prefix of this (estimated) size is long enough for Anthropic to cache"""
+    return prefix_tokens >= MIN_CACHEABLE_TOKENS
+
+
+def text_block(text: str, cache: bool = False) -> Dict[str, Any]:
+    """Text content block, ending in a cache_control breakpoint if cache is set"""
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def cached_system_message(text: str, name: Optional[str] = None) -> SystemMessage:
+    """
+    System message whose text ends with a cache_control breakpoint.
+
+    Everything up to and including this block (tools, then system) is
+    cached by Anthropic for 5 minutes, so it must not contain anything
+    that varies per request. Text shorter than MIN_CACHEABLE_TOKENS gets
+    no breakpoint, since the API would not cache it anyway.
+    """
+    estimated = estimate_tokens(text)
+    cache = is_cacheable(estimated)
+    if not cache:
+        print(f"ℹ️  Prompt prefix '{name or 'system'}' is ~{estimated} tokens, below the {MIN_CACHEABLE_TOKENS}-token "
+              f"caching minimum; sent without a cache breakpoint")
+    return SystemMessage(content=[text_block(text, cache=cache)])
+
+
+def cache_usage(message) -> Dict[str, int]:
+    """Token usage of a ChatAnthropic response (or aggregated stream chunk), split by cache status"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    cache_read = details.get("cache_read") or 0
+    cache_creation = (details.get("cache_creation") or 0) + (details.get("ephemeral_5m_input_tokens") or 0) + (details.get("ephemeral_1h_input_tokens") or 0)
+    input_tokens = usage.get("input_tokens") or 0  # Includes cached tokens
+    return {
+        "input_tokens": input_tokens,
+        "uncached_input_tokens": max(input_tokens - cache_read - cache_creation, 0),
+        "cache_read_tokens": cache_read,
+        "cache_creation_tokens": cache_creation,
+        "output_tokens": usage.get("output_tokens") or 0,
+    }
+
+
+class PromptCacheUsage:
+    """Per-call-site prompt cache hit/miss and input token savings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name: str, message) -> Dict[str, Any]:
+        """
+        Record the usage of one model call.
+
+        Args:
+            name: Call site (e.g. "shikshak", "manim")
+            message: The AIMessage returned by the model
+
+        Returns:
+            This call's usage with `cache_hit` and `input_cost_saved_pct`
+        """
+        usage = cache_usage(message)
+        with self._lock:
+            totals = self._totals[name]
+            totals["calls"] += 1
+            totals["cache_hits"] += 1 if usage["cache_read_tokens"] else 0
+            totals["cache_writes"] += 1 if usage["cache_creation_tokens"] else 0
+            for key, value in usage.items():
+                totals[key] += value
+
+        call = dict(usage, cache_hit=usage["cache_read_tokens"] > 0, input_cost_saved_pct=self._saved_pct(usage))
+        status = "hit" if call["cache_hit"] else ("write" if usage["cache_creation_tokens"] else "miss")
+        print(f"💾 Prompt cache {status} [{name}]: read {usage['cache_read_tokens']}, written {usage['cache_creation_tokens']}, "
+              f"uncached {usage['uncached_input_tokens']} input tokens ({call['input_cost_saved_pct']}% input cost saved)")
+        return call
+
+    @staticmethod
+    def _saved_pct(usage: Dict[str, int]) -> float:
+        """Input cost saved vs. sending the same tokens uncached (negative on a cache write)"""
+        if not usage["input_tokens"]:
+            return 0.0
+        saved = usage["cache_read_tokens"] * (1 - CACHE_READ_PRICE) - usage["cache_creation_tokens"] * (CACHE_WRITE_PRICE - 1)
+        return round(100 * saved / usage["input_tokens"], 1)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: dict(
+                    totals,
+                    hit_rate=round(totals["cache_hits"] / totals["calls"], 3) if totals["calls"] else 0.0,
+                    input_cost_saved_pct=self._saved_pct(totals),
+                )
+                for name, totals in self._totals.items()
+            }
+
+
+# Shared by every agent in the process
+prompt_cache_usage = PromptCacheUsage()
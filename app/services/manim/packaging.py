@@ -0,0 +1,258 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    height: int
+    video_bitrate: str  # ffmpeg bitrate string, e.g. "400k"
+    max_rate: str
+    buffer_size: str
+
+
+# Sized for 2G/3G school connections first; the top rung is for Wi-Fi
+DEFAULT_LADDER = [
+    Rendition(name="240p", height=240, video_bitrate="300k", max_rate="350k", buffer_size="600k"),
+    Rendition(name="360p", height=360, video_bitrate="600k", max_rate="700k", buffer_size="1200k"),
+    Rendition(name="720p", height=720, video_bitrate="1800k", max_rate="2000k", buffer_size="4000k"),
+]
+
+SEGMENT_SECONDS = 2
+OUTPUT_FPS = 30
+PREVIEW_SECONDS = 4
+PREVIEW_WIDTH = 320
+POSTER_WIDTH = 854
+FFMPEG_TIMEOUT = 180
+
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".mp4": "video/mp4",
+}
+
+
+def _run_ffmpeg(args: List[str], ffmpeg_executable: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [ffmpeg_executable, "-hide_banner", "-loglevel", "error", "-y", *args],
+        capture_output=True,
+        text=True,
+        timeout=FFMPEG_TIMEOUT,
+    )
+
+
+def _hls_args(video_path: str, output_dir: Path, ladder: List[Rendition]) -> List[str]:
+    """Single ffmpeg pass that decodes once and encodes every rendition"""
+    split_outputs = "".join(f"[v{i}]" for i in range(len(ladder)))
+    filters = [f"[0:v]fps={OUTPUT_FPS},split={len(ladder)}{split_outputs}"]
+    for i, rendition in enumerate(ladder):
+        filters.append(f"[v{i}]scale=-2:{rendition.height}[v{i}out]")
+
+    args = ["-i", video_path, "-filter_complex", ";".join(filters)]
+    for i, rendition in enumerate(ladder):
+        args += [
+            "-map", f"[v{i}out]",
+            f"-c:v:{i}", "libx264",
+            f"-b:v:{i}", rendition.video_bitrate,
+            f"-maxrate:v:{i}", rendition.max_rate,
+            f"-bufsize:v:{i}", rendition.buffer_size,
+        ]
+
+    var_stream_map = " ".join(f"v:{i},name:{rendition.name}" for i, rendition in enumerate(ladder))
+    args += [
+        "-preset", "veryfast",
+        "-profile:v", "main",
+        "-pix_fmt", "yuv420p",
+        # Keyframe on every segment boundary so each segment starts playback on its own
+        "-force_key_frames", f"expr:gte(t,n_forced*{SEGMENT_SECONDS})",
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", str(output_dir / "%v" / "segment_%03d.ts"),
+        "-master_pl_name", "master.m3u8",
+        "-var_stream_map", var_stream_map,
+        str(output_dir / "%v" / "index.m3u8"),
+    ]
+    return args
+
+
+def package_video(
+    video_path: str,
+    output_dir: str,
+    ladder: Optional[List[Rendition]] = None,
+    ffmpeg_executable: str = "ffmpeg",
+) -> Dict[str, Any]:
+    """
+    Package a rendered animation for low-bandwidth playback.
+
+    Produces an HLS master playlist with one media playlist per rendition,
+    a poster frame (the final frame, where Manim scenes are complete) and a
+    short animated preview.
+
+    Args:
+        video_path: Rendered MP4
+        output_dir: Directory to write the package into (replaced if it exists)
+        ladder: Renditions to encode (defaults to DEFAULT_LADDER)
+        ffmpeg_executable: ffmpeg binary to use
+
+    Returns:
+        Dict with `status`, paths to `master_playlist`, `poster`, `preview`,
+        the `renditions` written and any per-step `errors`
+    """
+    ladder = ladder or DEFAULT_LADDER
+    package_dir = Path(output_dir)
+    result = {
+        "status": "error",
+        "package_dir": str(package_dir),
+        "master_playlist": None,
+        "renditions": [],
+        "poster": None,
+        "preview": None,
+        "errors": [],
+    }
+
+    if shutil.which(ffmpeg_executable) is None and not os.path.exists(ffmpeg_executable):
+        result["errors"].append(f"ffmpeg not found: {ffmpeg_executable}")
+        return result
+
+    if package_dir.exists():
+        shutil.rmtree(package_dir)
+    for rendition in ladder:
+        (package_dir / rendition.name).mkdir(parents=True, exist_ok=True)
+
+    try:
+        hls = _run_ffmpeg(_hls_args(video_path, package_dir, ladder), ffmpeg_executable)
+        if hls.returncode == 0 and (package_dir / "master.m3u8").exists():
+            result["master_playlist"] = str(package_dir / "master.m3u8")
+            result["renditions"] = [
+                {
+                    "name": rendition.name,
+                    "height": rendition.height,
+                    "bandwidth": rendition.max_rate,
+                    "playlist": str(package_dir / rendition.name / "index.m3u8"),
+                }
+                for rendition in ladder
+            ]
+        else:
+            result["errors"].append(f"HLS packaging failed: {hls.stderr.strip()[-500:]}")
+
+        poster_path = package_dir / "poster.jpg"
+        poster = _run_ffmpeg(
+            ["-sseof", "-0.5", "-i", video_path, "-frames:v", "1", "-vf", f"scale={POSTER_WIDTH}:-2", "-q:v", "4", str(poster_path)],
+            ffmpeg_executable,
+        )
+        if poster.returncode == 0 and poster_path.exists():
+            result["poster"] = str(poster_path)
+        else:
+            result["errors"].append(f"Poster extraction failed: {poster.stderr.strip()[-500:]}")
+
+        result["preview"] = _make_preview(video_path, package_dir, ffmpeg_executable, result["errors"])
+
+    except subprocess.TimeoutExpired as e:
+        result["errors"].append(f"ffmpeg timed out after {e.timeout} seconds")
+
+    # The HLS ladder is what matters for playback; poster/preview are best effort
+    if result["master_playlist"]:
+        result["status"] = "success" if not result["errors"] else "partial_success"
+    return result
+
+
+def _make_preview(video_path: str, package_dir: Path, ffmpeg_executable: str, errors: List[str]) -> Optional[str]:
+    """Animated WebP preview, falling back to GIF when ffmpeg lacks libwebp"""
+    preview_filter = f"fps=10,scale={PREVIEW_WIDTH}:-2"
+
+    webp_path = package_dir / "preview.webp"
+    webp = _run_ffmpeg(
+        ["-t", str(PREVIEW_SECONDS), "-i", video_path, "-vf", preview_filter, "-c:v", "libwebp", "-quality", "60", "-loop", "0", "-an", str(webp_path)],
+        ffmpeg_executable,
+    )
+    if webp.returncode == 0 and webp_path.exists():
+        return str(webp_path)
+
+    gif_path = package_dir / "preview.gif"
+    gif = _run_ffmpeg(
+        [
+            "-t", str(PREVIEW_SECONDS), "-i", video_path,
+            "-vf", f"{preview_filter},split[a][b];[a]palettegen=max_colors=64[p];[b][p]paletteuse",
+            "-loop", "0", str(gif_path),
+        ],
+        ffmpeg_executable,
+    )
+    if gif.returncode == 0 and gif_path.exists():
+        return str(gif_path)
+
+    errors.append(f"Preview generation failed: {gif.stderr.strip()[-500:]}")
+    return None
+
+
+def upload_package(uploader, package: Dict[str, Any], folder: str, max_workers: int = 8) -> Dict[str, Optional[str]]:
+    """
+    Upload a packaged animation, keeping its directory layout so relative
+    playlist references keep working.
+
+    Args:
+        uploader: GCPStorageUploader instance
+        package: Result of package_video
+        folder: Bucket folder to upload under (same folder as the MP4)
+        max_workers: Parallel uploads (HLS produces many small segment files)
+
+    Returns:
+        Dict with `hls_master_url`, `poster_url`, `preview_url` and per-rendition
+        playlist URLs under `renditions`; None for anything that failed to upload
+    """
+    package_dir = Path(package["package_dir"])
+    files = [path for path in package_dir.rglob("*") if path.is_file()]
+
+    def upload(path: Path) -> Optional[str]:
+        return uploader.upload_file(
+            file_path=path,
+            destination_blob_name=f"hls/{path.relative_to(package_dir).as_posix()}",
+            content_type=CONTENT_TYPES.get(path.suffix, "application/octet-stream"),
+            make_public=True,
+            folder=folder,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        uploaded = dict(zip(files, pool.map(upload, files)))
+
+    def url_for(local_path: Optional[str]) -> Optional[str]:
+        if not local_path:
+            return None
+        return public_url(uploaded.get(Path(local_path)))
+
+    return {
+        "hls_master_url": url_for(package["master_playlist"]),
+        "poster_url": url_for(package["poster"]),
+        "preview_url": url_for(package["preview"]),
+        "renditions": [
+            {
+                "name": rendition["name"],
+                "height": rendition["height"],
+                "bandwidth": rendition["bandwidth"],
+                "playlist_url": url_for(rendition["playlist"]),
+            }
+            for rendition in package["renditions"]
+        ],
+        "failed_uploads": sum(1 for value in uploaded.values() if not value),
+    }
+
+
+def public_url(upload_result: Optional[str]) -> Optional[str]:
+    """Turn an uploader result (public URL or gs:// path) into an https URL"""
+    if not upload_result:
+        return None
+    if upload_result.startswith("gs://"):
+        gs_parts = upload_result.replace("gs://", "").split("/", 1)
+        bucket_name = gs_parts[0]
+        file_path_gcp = gs_parts[1] if len(gs_parts) > 1 else ""
+        return f"https://storage.googleapis.com/{bucket_name}/{file_path_gcp}"
+    return upload_result
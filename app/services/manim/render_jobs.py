@@ -0,0 +1,244 @@
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.services.manim.sandbox import SandboxLimits, popen_sandboxed, kill_sandboxed, make_scratch_dir, describe_exit
+
+# Manim CLI quality flag -> output folder name manim writes into
+QUALITY_DIRS = {
+    "l": "480p15",
+    "m": "720p30",
+    "h": "1080p60",
+    "p": "1440p60",
+    "k": "2160p60",
+}
+
+# How much of stderr to keep on a failed job
+STDERR_TAIL_CHARS = 4000
+
+
+def expected_video_path(media_dir: Path, scene_file: Path, scene_name: str, quality: str = "h") -> Path:
+    """Where manim writes the video for `-q<quality> -o <scene_name>.mp4 --media_dir <media_dir>`"""
+    return media_dir / "videos" / scene_file.stem / QUALITY_DIRS[quality] / f"{scene_name}.mp4"
+
+
+def build_render_command(manim_executable: str, scene_file: Path, scene_name: str, media_dir: Path, quality: str = "h") -> List[str]:
+    """Manim command line with a pinned output name so the artifact path is known up front"""
+    return [
+        manim_executable,
+        "render",
+        str(scene_file),
+        scene_name,
+        f"-q{quality}",
+        "-o", f"{scene_name}.mp4",
+        "--media_dir", str(media_dir),
+    ]
+
+
+@dataclass
+class RenderJob:
+    job_id: str
+    scene_name: str
+    command: List[str]
+    cwd: str
+    artifact_path: str
+    timeout: int
+    limits: Optional[SandboxLimits] = None
+    scratch_root: Optional[str] = None
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    returncode: Optional[int] = None
+    error: Optional[str] = None
+    stderr: Optional[str] = None
+    process: Optional[subprocess.Popen] = field(default=None, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "job_id": self.job_id,
+            "scene_name": self.scene_name,
+            "status": self.status,
+            "artifact_path": self.artifact_path,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": elapsed,
+            "returncode": self.returncode,
+            "error": self.error,
+            "stderr": self.stderr,
+        }
+
+
+class RenderJobManager:
+    """Runs Manim renders on a bounded worker pool so callers can submit and poll"""
+
+    TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, max_history: int = 200):
+        """
+        Args:
+            max_workers: Number of renders allowed to run at once
+            max_pending: Maximum queued + running jobs before submissions are rejected
+            max_history: Finished jobs kept around for render_status lookups
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="manim-render")
+        self._jobs: Dict[str, RenderJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        scene_name: str,
+        command: List[str],
+        cwd: str,
+        artifact_path: str,
+        timeout: int = 300,
+        limits: Optional[SandboxLimits] = None,
+        scratch_root: Optional[str] = None,
+    ) -> RenderJob:
+        """Queue a render. Runs sandboxed when `limits` is given. Raises RuntimeError if the queue is full."""
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status not in self.TERMINAL_STATES)
+            if active >= self.max_pending:
+                raise RuntimeError(f"Render queue is full ({active} jobs pending)")
+
+            job = RenderJob(
+                job_id=uuid.uuid4().hex[:12],
+                scene_name=scene_name,
+                command=command,
+                cwd=cwd,
+                artifact_path=artifact_path,
+                timeout=limits.wall_clock_seconds if limits else timeout,
+                limits=limits,
+                scratch_root=scratch_root,
+            )
+            self._jobs[job.job_id] = job
+            self._prune_history()
+
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[RenderJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[RenderJob]:
+        """Cancel a queued job or terminate a running one"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in self.TERMINAL_STATES:
+                return job
+
+            if job.status == "queued" and job.future is not None and job.future.cancel():
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                return job
+
+            job.status = "cancelled"
+            process = job.process
+
+        if process is not None:
+            kill_sandboxed(process, signal.SIGTERM)
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[RenderJob]:
+        """Block until the job finishes (used by the synchronous render_scene tool)"""
+        job = self.get(job_id)
+        if job is not None and job.future is not None:
+            try:
+                job.future.result(timeout=timeout)
+            except CancelledError:
+                pass
+        return job
+
+    def _prune_history(self):
+        finished = [job for job in self._jobs.values() if job.status in self.TERMINAL_STATES]
+        overflow = len(finished) - self.max_history
+        if overflow > 0:
+            finished.sort(key=lambda job: job.finished_at or 0)
+            for job in finished[:overflow]:
+                del self._jobs[job.job_id]
+
+    def _run(self, job: RenderJob):
+        with self._lock:
+            if job.status == "cancelled":
+                job.finished_at = job.finished_at or time.time()
+                return
+            job.status = "running"
+            job.started_at = time.time()
+
+        scratch_dir = None
+        try:
+            if job.limits:
+                scratch_dir = make_scratch_dir(job.scratch_root)
+                process = popen_sandboxed(job.command, job.limits, scratch_dir, cwd=job.cwd)
+            else:
+                process = subprocess.Popen(
+                    job.command,
+                    cwd=job.cwd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    start_new_session=True,
+                )
+            with self._lock:
+                job.process = process
+                cancelled = job.status == "cancelled"
+            if cancelled:
+                kill_sandboxed(process, signal.SIGTERM)
+
+            try:
+                _, stderr = process.communicate(timeout=job.timeout)
+            except subprocess.TimeoutExpired:
+                kill_sandboxed(process)
+                _, stderr = process.communicate()
+                job.error = f"Render timed out after {job.timeout} seconds"
+
+            if job.error is None and job.limits:
+                limit_exceeded = describe_exit(process.returncode, stderr, job.limits)
+                if limit_exceeded:
+                    job.error = f"Render stopped: {limit_exceeded}"
+
+            job.returncode = process.returncode
+            job.stderr = stderr[-STDERR_TAIL_CHARS:] if stderr else None
+
+            with self._lock:
+                if job.status == "cancelled":
+                    job.error = job.error or "Render cancelled"
+                elif job.error is None and process.returncode == 0 and Path(job.artifact_path).exists():
+                    job.status = "succeeded"
+                else:
+                    job.status = "failed"
+                    if job.error is None:
+                        if process.returncode == 0:
+                            job.error = f"Render finished but no video at {job.artifact_path}"
+                        else:
+                            job.error = f"Manim rendering failed with code {process.returncode}"
+        except Exception as e:
+            with self._lock:
+                job.status = "failed"
+                job.error = f"Error rendering scene: {str(e)}"
+        finally:
+            if scratch_dir:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+            with self._lock:
+                job.process = None
+                job.finished_at = time.time()
@@ -0,0 +1,207 @@
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+from dataclasses import dataclass, replace, asdict
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows - no rlimits, renders run unsandboxed
+    resource = None
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    cpu_seconds: int  # RLIMIT_CPU, per process: manim and each ffmpeg child get their own budget
+    memory_mb: int  # RLIMIT_AS, address space of the render process
+    wall_clock_seconds: int  # Killed after this long regardless of CPU use
+    cpu_cores: int  # Renders are pinned to this many cores
+    file_size_mb: int = 2048  # RLIMIT_FSIZE, largest file a render may write
+    max_open_files: int = 1024
+    nice: int = 10  # Lower scheduling priority than the API workers
+
+
+# Per manim quality flag (-ql, -qm, -qh, -qp, -qk)
+DEFAULT_QUALITY_LIMITS = {
+    "l": SandboxLimits(cpu_seconds=120, memory_mb=1536, wall_clock_seconds=90, cpu_cores=1),
+    "m": SandboxLimits(cpu_seconds=240, memory_mb=2048, wall_clock_seconds=150, cpu_cores=2),
+    "h": SandboxLimits(cpu_seconds=480, memory_mb=3072, wall_clock_seconds=240, cpu_cores=2),
+    "p": SandboxLimits(cpu_seconds=720, memory_mb=4096, wall_clock_seconds=300, cpu_cores=2),
+    "k": SandboxLimits(cpu_seconds=900, memory_mb=4096, wall_clock_seconds=300, cpu_cores=2),
+}
+
+# Only these variables reach generated code - API keys and cloud credentials stay out
+PASSTHROUGH_ENV = ("PATH", "LANG", "LC_ALL", "PYTHONPATH", "VIRTUAL_ENV", "CONDA_PREFIX", "FONTCONFIG_PATH")
+
+STDERR_TAIL_CHARS = 4000
+
+
+def limits_for_quality(quality: str, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> SandboxLimits:
+    """Default limits for a quality tier with any configured per-tier overrides applied"""
+    limits = DEFAULT_QUALITY_LIMITS.get(quality, DEFAULT_QUALITY_LIMITS["h"])
+    tier_overrides = (overrides or {}).get(quality)
+    if tier_overrides:
+        limits = replace(limits, **tier_overrides)
+    return limits
+
+
+def _sandbox_env(scratch_dir: str, limits: SandboxLimits) -> Dict[str, str]:
+    env = {key: os.environ[key] for key in PASSTHROUGH_ENV if key in os.environ}
+    env.update({
+        "HOME": scratch_dir,
+        "TMPDIR": scratch_dir,
+        "XDG_CACHE_HOME": os.path.join(scratch_dir, ".cache"),
+        # Keep numpy/BLAS and malloc from reserving address space per thread
+        "OMP_NUM_THREADS": str(limits.cpu_cores),
+        "OPENBLAS_NUM_THREADS": str(limits.cpu_cores),
+        "MKL_NUM_THREADS": str(limits.cpu_cores),
+        "MALLOC_ARENA_MAX": "2",
+    })
+    return env
+
+
+def _limit_prefix(limits: SandboxLimits) -> List[str]:
+    """
+    prlimit/taskset/nice wrapper applying the limits before the command execs.
+
+    Empty when the util-linux tools aren't installed; popen_sandboxed then
+    applies the limits to the started process instead.
+    """
+    if os.name != "posix" or not (shutil.which("prlimit") and shutil.which("taskset") and shutil.which("nice")):
+        return []
+    memory_bytes = limits.memory_mb * 1024 * 1024
+    file_bytes = limits.file_size_mb * 1024 * 1024
+    return [
+        "prlimit",
+        f"--cpu={limits.cpu_seconds}:{limits.cpu_seconds + 5}",
+        f"--as={memory_bytes}",
+        f"--fsize={file_bytes}",
+        f"--nofile={limits.max_open_files}",
+        "--core=0",
+        "--",
+        "taskset", "--cpu-list", ",".join(str(core) for core in _render_cores(limits)),
+        "nice", "-n", str(limits.nice),
+    ]
+
+
+def _render_cores(limits: SandboxLimits) -> List[int]:
+    """The highest-numbered cores, leaving the first ones to the API workers"""
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    return available[-limits.cpu_cores:]
+
+
+def _limit_process(pid: int, limits: SandboxLimits):
+    """Apply the limits to an already started process (fallback when prlimit isn't installed)"""
+    if resource is not None and hasattr(resource, "prlimit"):
+        resource.prlimit(pid, resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5))
+        memory_bytes = limits.memory_mb * 1024 * 1024
+        resource.prlimit(pid, resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        file_bytes = limits.file_size_mb * 1024 * 1024
+        resource.prlimit(pid, resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+        resource.prlimit(pid, resource.RLIMIT_NOFILE, (limits.max_open_files, limits.max_open_files))
+        resource.prlimit(pid, resource.RLIMIT_CORE, (0, 0))
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(pid, _render_cores(limits))
+    if hasattr(os, "setpriority"):
+        os.setpriority(os.PRIO_PROCESS, pid, limits.nice)
+
+
+def popen_sandboxed(cmd: List[str], limits: SandboxLimits, scratch_dir: str, cwd: Optional[str] = None) -> subprocess.Popen:
+    """
+    Start a command under the given limits with its own scratch HOME/TMPDIR.
+
+    No preexec_fn: it can deadlock between fork and exec in a threaded
+    process (uvicorn, the render thread pool). The command runs in its own
+    session, so a timeout can kill manim and its ffmpeg children together,
+    and the limits come from a prlimit/taskset/nice prefix or, without
+    those tools, are applied to the child right after it starts.
+    """
+    prefix = _limit_prefix(limits)
+    process = subprocess.Popen(
+        prefix + list(cmd),
+        cwd=cwd or scratch_dir,
+        env=_sandbox_env(scratch_dir, limits),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=os.name == "posix",
+    )
+    if not prefix and os.name == "posix":
+        try:
+            _limit_process(process.pid, limits)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not apply sandbox limits to pid {process.pid}: {e}")
+    return process
+
+
+def kill_sandboxed(process: subprocess.Popen, sig: int = signal.SIGKILL):
+    """Signal the whole process group started by popen_sandboxed"""
+    if process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, sig)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        process.send_signal(sig)
+
+
+def make_scratch_dir(root: Optional[str] = None) -> str:
+    if root:
+        os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix="manim-sandbox-", dir=root)
+
+
+def describe_exit(returncode: Optional[int], stderr: Optional[str], limits: SandboxLimits) -> Optional[str]:
+    """Human readable reason when a sandboxed render was stopped by one of its limits"""
+    if returncode == -signal.SIGXCPU:
+        return f"CPU time limit of {limits.cpu_seconds}s exceeded"
+    if returncode == -signal.SIGKILL:
+        return f"Killed after exceeding the CPU ({limits.cpu_seconds}s) or memory ({limits.memory_mb} MB) limit"
+    if returncode == -getattr(signal, "SIGXFSZ", 0):
+        return f"File size limit of {limits.file_size_mb} MB exceeded"
+    if stderr and ("MemoryError" in stderr or "Cannot allocate memory" in stderr or "std::bad_alloc" in stderr):
+        return f"Memory limit of {limits.memory_mb} MB exceeded"
+    return None
+
+
+def run_sandboxed(cmd: List[str], limits: SandboxLimits, cwd: Optional[str] = None, scratch_root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run a command to completion inside the sandbox.
+
+    Args:
+        cmd: Command line to run
+        limits: Resource limits for the run
+        cwd: Working directory (defaults to the scratch directory)
+        scratch_root: Parent for the per-run scratch directory (system temp if None)
+
+    Returns:
+        Dict with `returncode`, `stdout`, `stderr`, `timed_out`, `limit_exceeded`
+        (a reason string or None) and the `limits` that applied
+    """
+    scratch_dir = make_scratch_dir(scratch_root)
+    timed_out = False
+    try:
+        process = popen_sandboxed(cmd, limits, scratch_dir, cwd=cwd)
+        try:
+            stdout, stderr = process.communicate(timeout=limits.wall_clock_seconds)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            kill_sandboxed(process)
+            stdout, stderr = process.communicate()
+
+        limit_exceeded = describe_exit(process.returncode, stderr, limits)
+        if timed_out:
+            limit_exceeded = f"Wall-clock limit of {limits.wall_clock_seconds}s exceeded"
+
+        return {
+            "returncode": process.returncode,
+            "stdout": stdout,
+            "stderr": stderr[-STDERR_TAIL_CHARS:] if stderr else stderr,
+            "timed_out": timed_out,
+            "limit_exceeded": limit_exceeded,
+            "limits": asdict(limits),
+        }
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
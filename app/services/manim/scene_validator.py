@@ -0,0 +1,305 @@
+import ast
+import builtins
+import importlib
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set
+
+# Mobjects that shell out to LaTeX - we don't ship a TeX distribution
+LATEX_MOBJECTS = {
+    "MathTex",
+    "Tex",
+    "SingleStringMathTex",
+    "Title",
+    "BulletedList",
+}
+
+# Guards against scenes that would take forever to render
+MAX_LOOP_ITERATIONS = 200
+MAX_WAIT_SECONDS = 10.0
+MAX_TOTAL_WAIT_SECONDS = 60.0
+MAX_RUN_TIME_SECONDS = 15.0
+
+
+@lru_cache(maxsize=None)
+def _module_exports(module_name: str) -> Optional[frozenset]:
+    """Names exported by `from <module_name> import *`, or None if the module can't be imported"""
+    try:
+        module = importlib.import_module(module_name)
+    except Exception:
+        return None
+    exported = getattr(module, "__all__", None)
+    if exported is None:
+        exported = [name for name in dir(module) if not name.startswith("_")]
+    return frozenset(exported)
+
+
+def _issue(code: str, message: str, node: Optional[ast.AST] = None) -> Dict[str, Any]:
+    return {
+        "code": code,
+        "message": message,
+        "line": getattr(node, "lineno", None),
+    }
+
+
+def _constant_number(node: ast.AST) -> Optional[float]:
+    """Return the numeric value of a literal (including negated literals), else None"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return float(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant_number(node.operand)
+        return -value if value is not None else None
+    return None
+
+
+def _call_name(node: ast.Call) -> Optional[str]:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _base_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _bound_names(tree: ast.AST) -> Set[str]:
+    """Every name the code binds anywhere (flow-insensitive)"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.alias) and node.name != "*":
+            names.add((node.asname or node.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+    return names
+
+
+def _star_import_names(tree: ast.AST) -> Optional[Set[str]]:
+    """Names pulled in via star imports, or None if any star import can't be resolved"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            exported = _module_exports(node.module or "")
+            if exported is None:
+                return None
+            names.update(exported)
+    return names
+
+
+def _check_undefined_names(tree: ast.AST, issues: List[Dict[str, Any]], warnings: List[Dict[str, Any]]):
+    star_names = _star_import_names(tree)
+    if star_names is None:
+        warnings.append(_issue(
+            "undefined_names_skipped",
+            "Could not import manim to resolve star imports; undefined-name check skipped",
+        ))
+        return
+
+    known = _bound_names(tree) | star_names | set(dir(builtins))
+    reported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            if node.id not in known and node.id not in reported:
+                reported.add(node.id)
+                issues.append(_issue(
+                    "undefined_name",
+                    f"Name '{node.id}' is not defined and is not exported by manim",
+                    node,
+                ))
+
+
+def _has_break(loop: ast.While) -> bool:
+    """True if the loop body contains a break that belongs to this loop"""
+    stack = list(loop.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Break):
+            return True
+        # A break inside a nested loop or function doesn't exit this one
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        stack.extend(ast.iter_child_nodes(node))
+    return False
+
+
+def _range_length(call: ast.Call) -> Optional[float]:
+    """Iteration count of range(...) with literal arguments, else None"""
+    if _call_name(call) != "range" or call.keywords or not 1 <= len(call.args) <= 3:
+        return None
+    values = [_constant_number(arg) for arg in call.args]
+    if any(value is None for value in values):
+        return None
+    if len(values) == 1:
+        start, stop, step = 0.0, values[0], 1.0
+    else:
+        start, stop = values[0], values[1]
+        step = values[2] if len(values) == 3 else 1.0
+    if step == 0:
+        return None
+    return max(0.0, (stop - start) / step)
+
+
+def _check_loops(tree: ast.AST, issues: List[Dict[str, Any]]):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.While):
+            test = node.test
+            always_true = isinstance(test, ast.Constant) and bool(test.value)
+            if always_true and not _has_break(node):
+                issues.append(_issue(
+                    "unbounded_loop",
+                    "`while True` loop without a break would never finish rendering",
+                    node,
+                ))
+        elif isinstance(node, (ast.For, ast.AsyncFor)) and isinstance(node.iter, ast.Call):
+            iterations = _range_length(node.iter)
+            if iterations is not None and iterations > MAX_LOOP_ITERATIONS:
+                issues.append(_issue(
+                    "loop_too_long",
+                    f"Loop runs {int(iterations)} iterations (max {MAX_LOOP_ITERATIONS})",
+                    node,
+                ))
+
+
+def _check_timing(tree: ast.AST, issues: List[Dict[str, Any]]):
+    total_wait = 0.0
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        name = _call_name(node)
+
+        if name == "wait" and isinstance(node.func, ast.Attribute):
+            duration = None
+            if node.args:
+                duration = _constant_number(node.args[0])
+            for keyword in node.keywords:
+                if keyword.arg == "duration":
+                    duration = _constant_number(keyword.value)
+            if duration is not None:
+                total_wait += duration
+                if duration > MAX_WAIT_SECONDS:
+                    issues.append(_issue(
+                        "wait_too_long",
+                        f"self.wait({duration:g}) exceeds the {MAX_WAIT_SECONDS:g}s limit",
+                        node,
+                    ))
+
+        for keyword in node.keywords:
+            if keyword.arg == "run_time":
+                run_time = _constant_number(keyword.value)
+                if run_time is not None and run_time > MAX_RUN_TIME_SECONDS:
+                    issues.append(_issue(
+                        "run_time_too_long",
+                        f"run_time={run_time:g} exceeds the {MAX_RUN_TIME_SECONDS:g}s limit",
+                        node,
+                    ))
+
+    if total_wait > MAX_TOTAL_WAIT_SECONDS:
+        issues.append(_issue(
+            "total_wait_too_long",
+            f"Scene waits {total_wait:g}s in total (max {MAX_TOTAL_WAIT_SECONDS:g}s)",
+        ))
+
+
+def _check_scene_class(tree: ast.Module, scene_name: Optional[str], issues: List[Dict[str, Any]]):
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+
+    if scene_name:
+        scene_class = next((node for node in classes if node.name == scene_name), None)
+        if scene_class is None:
+            found = ", ".join(node.name for node in classes) or "none"
+            issues.append(_issue(
+                "missing_scene_class",
+                f"Expected a class named '{scene_name}' (found: {found})",
+            ))
+            return
+    else:
+        scene_class = next(
+            (node for node in classes if any((_base_name(base) or "").endswith("Scene") for base in node.bases)),
+            None,
+        )
+        if scene_class is None:
+            issues.append(_issue("missing_scene_class", "No Scene subclass found"))
+            return
+
+    if not any((_base_name(base) or "").endswith("Scene") for base in scene_class.bases):
+        issues.append(_issue(
+            "not_a_scene",
+            f"Class '{scene_class.name}' must inherit from Scene",
+            scene_class,
+        ))
+
+    has_construct = any(
+        isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "construct"
+        for node in scene_class.body
+    )
+    if not has_construct:
+        issues.append(_issue(
+            "missing_construct",
+            f"Class '{scene_class.name}' is missing a construct(self) method",
+            scene_class,
+        ))
+
+
+def _check_latex(tree: ast.AST, issues: List[Dict[str, Any]]):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _call_name(node) in LATEX_MOBJECTS:
+            issues.append(_issue(
+                "latex_not_supported",
+                f"{_call_name(node)}() needs LaTeX, which is not installed - use Text() instead",
+                node,
+            ))
+
+
+def validate_scene_code(scene_code: str, scene_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Statically validate generated Manim code before spending a render on it.
+
+    Args:
+        scene_code: Python source for the scene
+        scene_name: Class name the renderer will be asked for (optional)
+
+    Returns:
+        Dict with `valid`, a list of blocking `errors` and non-blocking `warnings`.
+        Each issue has `code`, `message` and `line`.
+    """
+    errors = []
+    warnings = []
+
+    try:
+        tree = ast.parse(scene_code)
+    except SyntaxError as e:
+        errors.append({
+            "code": "syntax_error",
+            "message": e.msg,
+            "line": e.lineno,
+        })
+        return {"valid": False, "errors": errors, "warnings": warnings}
+
+    _check_scene_class(tree, scene_name, errors)
+    _check_latex(tree, errors)
+    _check_undefined_names(tree, errors, warnings)
+    _check_loops(tree, errors)
+    _check_timing(tree, errors)
+
+    return {"valid": not errors, "errors": errors, "warnings": warnings}
+
+
+def format_validation_errors(validation: Dict[str, Any]) -> str:
+    """Render validation issues as a bullet list (for logs, MCP replies and repair prompts)"""
+    lines = []
+    for issue in validation["errors"]:
+        location = f"line {issue['line']}: " if issue.get("line") else ""
+        lines.append(f"• {location}{issue['message']} [{issue['code']}]")
+    return "\n".join(lines)
@@ -0,0 +1,693 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+# Prompts longer than this usually ask for something a template can't express
+MAX_TEMPLATE_PROMPT_WORDS = 40
+
+# Share of a prompt's content words a template must account for to serve it
+MIN_TEMPLATE_COVERAGE = 0.8
+
+# Words any animation request may contain without changing what it asks for
+FILLER_WORDS = {
+    "a", "an", "the", "of", "for", "to", "in", "on", "with", "and", "or", "is", "are", "be", "it", "its",
+    "this", "that", "these", "what", "me", "us", "my", "our", "i", "we", "you", "can", "please", "want",
+    "need", "show", "showing", "animate", "animation", "make", "create", "draw", "visualize", "visualise",
+    "illustrate", "display", "demonstrate", "teach", "video", "scene", "clip", "short", "simple", "easy",
+    "kids", "children", "students", "class", "grade", "std", "standard", "lesson", "concept", "idea",
+    "about", "how", "using", "look", "looks", "like", "understand", "learn", "nice", "small",
+    "as", "into", "by", "from", "at", "some",
+}
+
+# Asking for reasoning or a comparison needs a scene written for that prompt
+REASONING = re.compile(
+    r"\b(?:explain\w*|why|prove\w*|proof|compar\w*|difference|derive\w*|relationship|add\s+up|adds\s+up|sum|total)\b"
+)
+
+# Arithmetic between operands (a slash inside "3/4" is a fraction, not division)
+OPERATOR = re.compile(r"[+×÷*−]|(?<=\d)\s*-\s*(?=\d)|\b(?:plus|minus|times|multipl\w*|divided|subtract\w*|add|adding)\b")
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+
+FRACTION_WORDS = {
+    "half": 2, "halves": 2, "third": 3, "thirds": 3, "quarter": 4, "quarters": 4,
+    "fourth": 4, "fourths": 4, "fifth": 5, "fifths": 5, "sixth": 6, "sixths": 6,
+    "seventh": 7, "sevenths": 7, "eighth": 8, "eighths": 8, "ninth": 9, "ninths": 9,
+    "tenth": 10, "tenths": 10, "twelfth": 12, "twelfths": 12,
+}
+
+# Singular fraction words, which on their own mean one part ("half of a pizza")
+UNIT_FRACTION_WORDS = [word for word in FRACTION_WORDS if not word.endswith("s")]
+
+SHAPE_NAMES = ["triangle", "square", "rectangle", "circle", "pentagon", "hexagon"]
+
+
+@dataclass
+class AnimationTemplate:
+    name: str
+    description: str
+    extract_params: Callable[[str], Optional[Dict[str, Any]]]
+    build_code: Callable[[str, Dict[str, Any]], str]
+    common_params: List[Dict[str, Any]] = field(default_factory=list)
+    # Content words the template's scene actually depicts (besides FILLER_WORDS)
+    vocabulary: frozenset = frozenset()
+
+
+@dataclass
+class TemplateMatch:
+    template: AnimationTemplate
+    params: Dict[str, Any]
+    coverage: float = 1.0
+
+    @property
+    def variant_key(self) -> str:
+        """Stable key for this template + parameter set (used for pre-rendered variants)"""
+        return variant_key(self.template.name, self.params)
+
+    def build_code(self, scene_name: str) -> str:
+        return self.template.build_code(scene_name, self.params)
+
+
+def variant_key(template_name: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return f"{template_name}-{hashlib.sha1(canonical.encode()).hexdigest()[:12]}"
+
+
+def _parse_number(token: str) -> Optional[int]:
+    token = token.lower()
+    if token.lstrip("-").isdigit():
+        return int(token)
+    return NUMBER_WORDS.get(token)
+
+
+def template_coverage(prompt: str, vocabulary: frozenset) -> float:
+    """Share of the prompt's content words (not FILLER_WORDS) found in a template's vocabulary"""
+    text = prompt.lower()
+    # Numeric fractions ("3/4") count as words the fraction template covers
+    fractions = re.findall(r"\d+\s*/\s*\d+", text)
+    words = [word for word in re.findall(r"[a-z0-9]*[a-z][a-z0-9']*", text) if word not in FILLER_WORDS]
+    if not words and not fractions:
+        return 1.0
+    covered = sum(
+        1 for word in words
+        if word in vocabulary or word.rstrip("s") in vocabulary or (word.endswith("es") and word[:-2] in vocabulary)
+    )
+    if "fraction" in vocabulary:
+        covered += len(fractions)
+    return covered / (len(words) + len(fractions))
+
+
+# ---------------------------------------------------------------------------
+# Fractions
+# ---------------------------------------------------------------------------
+
+def _fraction_params(prompt: str) -> Optional[Dict[str, Any]]:
+    text = prompt.lower()
+    if not re.search(r"\bfraction|\bnumerator|\bdenominator|\bpizza|\bpie\b|\d+\s*/\s*\d+|\b(half|halves|third|quarter|fourth|fifth|sixth|eighth|tenth)s?\b", text):
+        return None
+    # The scene shows a single fraction: sums, products or several operands are LLM territory
+    operands = len(re.findall(r"\d+\s*/\s*\d+|\bout\s+of\b", text)) + len(re.findall(r"\b(?:" + "|".join(FRACTION_WORDS) + r")\b", text))
+    if operands > 1 or OPERATOR.search(text):
+        return None
+
+    numerator = denominator = None
+    match = re.search(r"(\d+)\s*/\s*(\d+)", text)
+    if match:
+        numerator, denominator = int(match.group(1)), int(match.group(2))
+    else:
+        match = re.search(r"\b(\w+)[\s-]+(" + "|".join(FRACTION_WORDS) + r")\b", text)
+        if match and _parse_number(match.group(1)) is not None:
+            numerator, denominator = _parse_number(match.group(1)), FRACTION_WORDS[match.group(2)]
+        else:
+            match = re.search(r"\b(a|one)\s+(" + "|".join(FRACTION_WORDS) + r")\b", text)
+            if match:
+                numerator, denominator = 1, FRACTION_WORDS[match.group(2)]
+            else:
+                match = re.search(r"(\d+|\w+)\s+out\s+of\s+(\d+|\w+)", text)
+                if match:
+                    numerator, denominator = _parse_number(match.group(1)), _parse_number(match.group(2))
+                else:
+                    match = re.search(r"\b(" + "|".join(UNIT_FRACTION_WORDS) + r")\b", text)
+                    if match:
+                        numerator, denominator = 1, FRACTION_WORDS[match.group(1)]
+
+    # Only take over prompts that actually mention the word fraction if no numbers were given
+    if numerator is None or denominator is None:
+        if "fraction" not in text:
+            return None
+        numerator, denominator = 1, 2
+
+    if not (2 <= denominator <= 12 and 0 < numerator <= denominator):
+        return None
+    return {"numerator": numerator, "denominator": denominator}
+
+
+def _fraction_code(scene_name: str, params: Dict[str, Any]) -> str:
+    numerator, denominator = params["numerator"], params["denominator"]
+    return f'''from manim import *
+
+class {scene_name}(Scene):
+    def construct(self):
+        title = Text("What is {numerator}/{denominator}?", font_size=48).to_edge(UP)
+        self.play(Write(title))
+        self.wait(0.5)
+
+        # Whole circle split into equal slices
+        slices = VGroup(*[
+            Sector(
+                outer_radius=2,
+                angle=TAU / {denominator},
+                start_angle=i * TAU / {denominator},
+                fill_color=GRAY,
+                fill_opacity=0.3,
+                stroke_color=WHITE,
+                stroke_width=3,
+            )
+            for i in range({denominator})
+        ]).shift(LEFT * 2.5 + DOWN * 0.5)
+        whole_label = Text("1 whole = {denominator} equal parts", font_size=28).next_to(slices, DOWN)
+        self.play(Create(slices), FadeIn(whole_label))
+        self.wait(1)
+
+        # Shade the numerator slices one at a time
+        for i in range({numerator}):
+            self.play(slices[i].animate.set_fill(BLUE, opacity=0.8), run_time=0.5)
+        self.wait(0.5)
+
+        numerator_text = Text("{numerator}", font_size=72, color=BLUE)
+        bar = Line(LEFT * 0.7, RIGHT * 0.7, stroke_width=6)
+        denominator_text = Text("{denominator}", font_size=72)
+        fraction = VGroup(numerator_text, bar, denominator_text).arrange(DOWN, buff=0.2).shift(RIGHT * 3 + UP * 0.5)
+        self.play(Write(fraction))
+
+        numerator_label = Text("parts shaded", font_size=24, color=BLUE).next_to(numerator_text, RIGHT)
+        denominator_label = Text("equal parts", font_size=24).next_to(denominator_text, RIGHT)
+        self.play(FadeIn(numerator_label), FadeIn(denominator_label))
+        self.wait(2)
+'''
+
+
+# ---------------------------------------------------------------------------
+# Number line
+# ---------------------------------------------------------------------------
+
+def _number_line_params(prompt: str) -> Optional[Dict[str, Any]]:
+    text = prompt.lower()
+    if "number line" not in text:
+        return None
+    # A single addition or subtraction jump at most
+    operators = OPERATOR.findall(text)
+    if len(operators) > 1 or re.search(r"[×÷*]|\b(?:times|multipl\w*|divided)\b", text):
+        return None
+
+    start, end = 0, 10
+    match = re.search(r"from\s+(-?\d+|\w+)\s+to\s+(-?\d+|\w+)", text)
+    if match:
+        parsed_start, parsed_end = _parse_number(match.group(1)), _parse_number(match.group(2))
+        if parsed_start is not None and parsed_end is not None:
+            start, end = parsed_start, parsed_end
+
+    jump_from = jump_by = None
+    match = re.search(r"(-?\d+)\s*(\+|plus|-|minus)\s*(\d+)", text)
+    if match:
+        jump_from = int(match.group(1))
+        jump_by = int(match.group(3)) * (1 if match.group(2) in ("+", "plus") else -1)
+    else:
+        match = re.search(r"\badd(?:ing)?\s+(\d+)\s+(?:and|to)\s+(\d+)", text)
+        if match:
+            jump_from, jump_by = int(match.group(1)), int(match.group(2))
+
+    if jump_from is not None:
+        start = min(start, jump_from, jump_from + jump_by)
+        end = max(end, jump_from, jump_from + jump_by)
+
+    if not (end > start and end - start <= 20):
+        return None
+    return {"start": start, "end": end, "jump_from": jump_from, "jump_by": jump_by}
+
+
+def _number_line_code(scene_name: str, params: Dict[str, Any]) -> str:
+    start, end = params["start"], params["end"]
+    jump_from, jump_by = params.get("jump_from"), params.get("jump_by")
+
+    jump_code = ""
+    if jump_from is not None and jump_by:
+        target = jump_from + jump_by
+        sign = "+" if jump_by > 0 else "-"
+        step = 1 if jump_by > 0 else -1
+        jump_code = f'''
+        dot = Dot(line.n2p({jump_from}), color=YELLOW, radius=0.12)
+        self.play(FadeIn(dot))
+        self.wait(0.5)
+
+        position = {jump_from}
+        for _ in range({abs(jump_by)}):
+            arc = ArcBetweenPoints(line.n2p(position), line.n2p(position + {step}), angle=-PI / 2 * {step}, color=YELLOW)
+            self.play(Create(arc), dot.animate.move_to(line.n2p(position + {step})), run_time=0.5)
+            position += {step}
+
+        answer = Text("{jump_from} {sign} {abs(jump_by)} = {target}", font_size=44, color=YELLOW).next_to(line, DOWN, buff=1.2)
+        self.play(Write(answer))
+        self.wait(2)
+'''
+    else:
+        jump_code = '''
+        for number in range({start}, {end} + 1):
+            self.play(Indicate(labels[number - ({start})]), run_time=0.3)
+        self.wait(2)
+'''.format(start=start, end=end)
+
+    return f'''from manim import *
+
+class {scene_name}(Scene):
+    def construct(self):
+        title = Text("Number Line", font_size=48).to_edge(UP)
+        self.play(Write(title))
+
+        line = NumberLine(
+            x_range=[{start}, {end}, 1],
+            length=12,
+            include_tip=True,
+            include_numbers=False,
+        )
+        # Text labels instead of include_numbers (which needs LaTeX)
+        labels = VGroup(*[
+            Text(str(number), font_size=24).next_to(line.n2p(number), DOWN)
+            for number in range({start}, {end} + 1)
+        ])
+        self.play(Create(line))
+        self.play(FadeIn(labels))
+        self.wait(0.5)
+{jump_code}'''
+
+
+# ---------------------------------------------------------------------------
+# Angles
+# ---------------------------------------------------------------------------
+
+def _angle_params(prompt: str) -> Optional[Dict[str, Any]]:
+    text = prompt.lower()
+    if not re.search(r"\bangles?\b", text):
+        return None
+    # One angle on its own: angles of a shape, several measures or arithmetic need their own scene
+    if OPERATOR.search(text) or len(re.findall(r"\d+\s*(?:°|deg)", text)) > 1:
+        return None
+    if any(re.search(rf"\b{name}s?\b", text) for name in SHAPE_NAMES):
+        return None
+
+    match = re.search(r"(\d+)\s*(°|deg|degree)", text)
+    if match:
+        degrees = int(match.group(1))
+    elif "right angle" in text:
+        degrees = 90
+    elif "straight angle" in text:
+        degrees = 180
+    elif "obtuse" in text:
+        degrees = 120
+    elif "acute" in text:
+        degrees = 45
+    elif "reflex" in text:
+        degrees = 240
+    else:
+        degrees = None
+
+    if degrees is None:
+        # Generic "types of angles" lesson
+        return {"degrees": None}
+    if not 0 < degrees < 360:
+        return None
+    return {"degrees": degrees}
+
+
+def _angle_kind(degrees: int) -> str:
+    if degrees < 90:
+        return "an acute angle"
+    if degrees == 90:
+        return "a right angle"
+    if degrees < 180:
+        return "an obtuse angle"
+    if degrees == 180:
+        return "a straight angle"
+    return "a reflex angle"
+
+
+def _angle_code(scene_name: str, params: Dict[str, Any]) -> str:
+    degrees = params.get("degrees")
+    showcase = [degrees] if degrees is not None else [45, 90, 135, 180]
+
+    steps = ""
+    for value in showcase:
+        steps += f'''
+        self.play(arm.animate.set_value({value}), run_time=1.5)
+        label = Text("{value} degrees is {_angle_kind(value)}", font_size=36).to_edge(DOWN)
+        self.play(Transform(caption, label))
+        self.wait(1.5)
+'''
+
+    return f'''from manim import *
+import numpy as np
+
+class {scene_name}(Scene):
+    def construct(self):
+        title = Text("Angles", font_size=48).to_edge(UP)
+        self.play(Write(title))
+
+        vertex = ORIGIN + DOWN * 0.5
+        arm = ValueTracker(0)
+        base = Line(vertex, vertex + RIGHT * 3, color=WHITE)
+        moving = always_redraw(
+            lambda: Line(vertex, vertex + 3 * np.array([np.cos(arm.get_value() * DEGREES), np.sin(arm.get_value() * DEGREES), 0]), color=BLUE)
+        )
+        arc = always_redraw(
+            lambda: Arc(radius=0.8, start_angle=0, angle=max(arm.get_value(), 0.01) * DEGREES, arc_center=vertex, color=YELLOW)
+        )
+        self.play(Create(base), Create(moving), Create(arc))
+
+        caption = Text("Watch the angle open", font_size=36).to_edge(DOWN)
+        self.play(FadeIn(caption))
+        self.wait(0.5)
+{steps}
+        self.wait(1)
+'''
+
+
+# ---------------------------------------------------------------------------
+# Shapes
+# ---------------------------------------------------------------------------
+
+def _shapes_params(prompt: str) -> Optional[Dict[str, Any]]:
+    text = prompt.lower()
+    shapes = [name for name in SHAPE_NAMES if re.search(rf"\b{name}s?\b", text)]
+    if not shapes and re.search(r"\b(basic|2d|simple)\s+shapes\b", text):
+        shapes = ["triangle", "square", "circle"]
+    if not shapes or len(shapes) > 4:
+        return None
+    # Anything beyond naming the shapes (areas, real-life objects, ...) is LLM territory
+    if re.search(r"\b(area|perimeter|volume|3d|cube|sphere|house|car|tree|cloud|transform\w*|morph\w*"
+                 r"|pi|circumference|radius|diameter|angles?|symmetry)\b", text):
+        return None
+    if OPERATOR.search(text):
+        return None
+    return {"shapes": shapes}
+
+
+SHAPE_CONSTRUCTORS = {
+    "triangle": "Triangle(color=RED, fill_opacity=0.5)",
+    "square": "Square(side_length=1.8, color=BLUE, fill_opacity=0.5)",
+    "rectangle": "Rectangle(width=2.4, height=1.4, color=GREEN, fill_opacity=0.5)",
+    "circle": "Circle(radius=1, color=YELLOW, fill_opacity=0.5)",
+    "pentagon": "RegularPolygon(n=5, color=PURPLE, fill_opacity=0.5)",
+    "hexagon": "RegularPolygon(n=6, color=ORANGE, fill_opacity=0.5)",
+}
+
+SHAPE_FACTS = {
+    "triangle": "3 sides, 3 corners",
+    "square": "4 equal sides, 4 corners",
+    "rectangle": "4 sides, opposite sides equal",
+    "circle": "no sides, no corners",
+    "pentagon": "5 sides, 5 corners",
+    "hexagon": "6 sides, 6 corners",
+}
+
+
+def _shapes_code(scene_name: str, params: Dict[str, Any]) -> str:
+    shapes = params["shapes"]
+    constructors = ",\n            ".join(SHAPE_CONSTRUCTORS[name] for name in shapes)
+    names = ", ".join(f'"{name.capitalize()}"' for name in shapes)
+    facts = ", ".join(f'"{SHAPE_FACTS[name]}"' for name in shapes)
+
+    return f'''from manim import *
+
+class {scene_name}(Scene):
+    def construct(self):
+        title = Text("Shapes Around Us", font_size=48).to_edge(UP)
+        self.play(Write(title))
+
+        shapes = VGroup(
+            {constructors}
+        ).arrange(RIGHT, buff=1).scale_to_fit_width(min(12, 3.2 * {len(shapes)}))
+        names = [{names}]
+        facts = [{facts}]
+
+        for shape, name, fact in zip(shapes, names, facts):
+            self.play(Create(shape))
+            name_text = Text(name, font_size=30).next_to(shape, DOWN)
+            fact_text = Text(fact, font_size=20, color=GRAY_B).next_to(name_text, DOWN, buff=0.15)
+            self.play(FadeIn(name_text), FadeIn(fact_text))
+            self.wait(1)
+
+        self.play(shapes.animate.set_fill(opacity=0.9), run_time=1)
+        self.wait(2)
+'''
+
+
+# ---------------------------------------------------------------------------
+# Water cycle
+# ---------------------------------------------------------------------------
+
+def _water_cycle_params(prompt: str) -> Optional[Dict[str, Any]]:
+    text = prompt.lower()
+    if re.search(r"water\s+cycle|hydrologic(al)?\s+cycle", text):
+        return {}
+    return None
+
+
+def _water_cycle_code(scene_name: str, params: Dict[str, Any]) -> str:
+    return f'''from manim import *
+
+class {scene_name}(Scene):
+    def construct(self):
+        title = Text("The Water Cycle", font_size=48).to_edge(UP)
+        self.play(Write(title))
+
+        sea = Rectangle(width=6, height=1.2, color=BLUE, fill_opacity=0.7).to_corner(DL, buff=0.3)
+        sea_label = Text("Sea", font_size=24).move_to(sea)
+        land = Polygon([1, -3.5, 0], [7, -3.5, 0], [7, -1, 0], [4, 0.5, 0], [2, -1.5, 0], color=GREEN, fill_opacity=0.6)
+        sun = Circle(radius=0.6, color=YELLOW, fill_opacity=1).to_corner(UL, buff=0.8).shift(DOWN * 0.6)
+        self.play(FadeIn(sea), FadeIn(sea_label), FadeIn(land), FadeIn(sun))
+        self.wait(0.5)
+
+        # Evaporation
+        vapour = VGroup(*[Arrow(sea.get_top() + RIGHT * x, sea.get_top() + RIGHT * x + UP * 2, color=WHITE, buff=0) for x in (-1.5, 0, 1.5)])
+        evaporation = Text("1. Evaporation", font_size=30, color=YELLOW).next_to(vapour, RIGHT)
+        self.play(GrowArrow(vapour[0]), GrowArrow(vapour[1]), GrowArrow(vapour[2]), Write(evaporation))
+        self.wait(1)
+
+        # Condensation
+        cloud = VGroup(
+            Ellipse(width=1.6, height=0.9),
+            Ellipse(width=1.4, height=1.0).shift(RIGHT * 0.8 + UP * 0.2),
+            Ellipse(width=1.4, height=0.8).shift(RIGHT * 1.5),
+        ).set_fill(WHITE, opacity=0.9).set_stroke(GRAY, 2).move_to(UP * 1.8 + RIGHT * 3)
+        condensation = Text("2. Condensation", font_size=30, color=YELLOW).next_to(cloud, UP, buff=0.2)
+        self.play(FadeOut(evaporation), FadeIn(cloud, shift=RIGHT), Write(condensation))
+        self.wait(1)
+
+        # Precipitation
+        drops = VGroup(*[Line(UP * 0.15, DOWN * 0.15, color=BLUE_B).move_to(cloud.get_bottom() + RIGHT * (x * 0.4 - 0.8) + DOWN * 0.4) for x in range(5)])
+        precipitation = Text("3. Precipitation", font_size=30, color=YELLOW).next_to(cloud, RIGHT, buff=0.2).shift(DOWN * 0.5)
+        self.play(FadeOut(condensation), FadeIn(drops), Write(precipitation))
+        self.play(drops.animate.shift(DOWN * 1.5), run_time=1.5)
+        self.wait(0.5)
+
+        # Collection
+        river = Arrow(land.get_center() + UP * 0.5, sea.get_right() + UP * 0.2, color=BLUE, buff=0)
+        collection = Text("4. Collection", font_size=30, color=YELLOW).next_to(river, DOWN, buff=0.2)
+        self.play(FadeOut(precipitation), GrowArrow(river), Write(collection))
+        self.wait(1)
+
+        summary = Text("The cycle repeats again and again!", font_size=32).to_edge(DOWN, buff=0.2)
+        self.play(FadeOut(collection), Write(summary))
+        self.wait(2)
+'''
+
+
+# Order matters: the first template whose extractor accepts the prompt wins
+TEMPLATES = [
+    AnimationTemplate(
+        name="water_cycle",
+        description="Evaporation, condensation, precipitation and collection",
+        extract_params=_water_cycle_params,
+        build_code=_water_cycle_code,
+        common_params=[{}],
+        vocabulary=frozenset({
+            "water", "cycle", "hydrologic", "hydrological", "evaporation", "condensation", "precipitation",
+            "collection", "rain", "cloud", "sun", "sea", "stage", "step", "process", "work", "works",
+        }),
+    ),
+    AnimationTemplate(
+        name="number_line",
+        description="Number line with optional addition/subtraction jumps",
+        extract_params=_number_line_params,
+        build_code=_number_line_code,
+        common_params=[
+            {"start": 0, "end": 10, "jump_from": None, "jump_by": None},
+            {"start": -5, "end": 5, "jump_from": None, "jump_by": None},
+        ],
+        vocabulary=frozenset({
+            "number", "line", "from", "jump", "jumping", "hop", "count", "counting", "forward", "backward",
+            "add", "adding", "addition", "plus", "minus", "subtract", "subtracting", "subtraction",
+            "negative", "positive", *NUMBER_WORDS,
+        }),
+    ),
+    AnimationTemplate(
+        name="fraction",
+        description="Fraction shown as shaded slices of a circle",
+        extract_params=_fraction_params,
+        build_code=_fraction_code,
+        common_params=[
+            {"numerator": 1, "denominator": 2},
+            {"numerator": 1, "denominator": 3},
+            {"numerator": 1, "denominator": 4},
+            {"numerator": 3, "denominator": 4},
+        ],
+        vocabulary=frozenset({
+            "fraction", "numerator", "denominator", "pizza", "pie", "cake", "slice", "part", "piece",
+            "equal", "whole", "shade", "shaded", "out", "circle", *NUMBER_WORDS, *FRACTION_WORDS,
+        }),
+    ),
+    AnimationTemplate(
+        name="angle",
+        description="Angle opening to a given measure, with its type",
+        extract_params=_angle_params,
+        build_code=_angle_code,
+        common_params=[{"degrees": None}, {"degrees": 90}],
+        vocabulary=frozenset({
+            "angle", "degree", "deg", "right", "straight", "obtuse", "acute", "reflex", "type", "kind",
+            "different", "measure", "open", "opening", *NUMBER_WORDS,
+        }),
+    ),
+    AnimationTemplate(
+        name="shapes",
+        description="Basic 2D shapes with their sides and corners",
+        extract_params=_shapes_params,
+        build_code=_shapes_code,
+        common_params=[{"shapes": ["triangle", "square", "circle"]}],
+        vocabulary=frozenset({
+            *SHAPE_NAMES, "shape", "basic", "2d", "side", "corner", "vertex", "vertice", "name", "type",
+            "kind", "different", "around",
+        }),
+    ),
+]
+
+
+def match_template(prompt: str, min_coverage: float = MIN_TEMPLATE_COVERAGE) -> Optional[TemplateMatch]:
+    """
+    Classify a prompt against the template library. Returns None if the LLM should handle it.
+
+    A template only serves the prompt when its extractor accepts it and its
+    vocabulary covers at least min_coverage of the prompt's content words,
+    so prompts asking for more than the scene shows (extra subjects,
+    reasoning, several operands) go to generate_scene_code.
+    """
+    if len(prompt.split()) > MAX_TEMPLATE_PROMPT_WORDS or REASONING.search(prompt.lower()):
+        return None
+
+    for template in TEMPLATES:
+        try:
+            params = template.extract_params(prompt)
+        except Exception:
+            params = None
+        if params is None:
+            continue
+        coverage = template_coverage(prompt, template.vocabulary)
+        if coverage < min_coverage:
+            print(f"🧩 Template '{template.name}' covers only {coverage:.0%} of the prompt, leaving it to the LLM")
+            continue
+        return TemplateMatch(template=template, params=params, coverage=round(coverage, 2))
+    return None
+
+
+# Prompt -> template that should serve it (None: left to the LLM).
+# Run `python -m app.services.manim.templates` after changing the classifier.
+TEMPLATE_EXAMPLES = [
+    ("Animate half of a pizza", "fraction"),
+    ("show half of a circle", "fraction"),
+    ("Show 3/4 as a fraction", "fraction"),
+    ("show 3/4 of a pizza", "fraction"),
+    ("what is two thirds", "fraction"),
+    ("show 1/2 of a pizza for grade 3", "fraction"),
+    ("show 3 + 4 on a number line", "number_line"),
+    ("number line from -5 to 5", "number_line"),
+    ("Show a right angle", "angle"),
+    ("show a 90 degree angle", "angle"),
+    ("Show types of angles", "angle"),
+    ("show triangles and squares", "shapes"),
+    ("Animate basic shapes for class 2 students", "shapes"),
+    ("Show the water cycle", "water_cycle"),
+    ("Show that the angles of a triangle add up to 180 degrees", None),
+    ("show 1/2 + 1/4", None),
+    ("compare 2/3 and 3/4", None),
+    ("Explain photosynthesis; the leaf uses a third of sunlight", None),
+    ("Explain the circumference of a circle and pi", None),
+    ("Animate the water cycle and also show pollution effects on rivers", None),
+    ("show 3 + 4 + 5 on a number line", None),
+]
+
+
+def check_template_examples() -> List[str]:
+    """Mismatches between match_template and TEMPLATE_EXAMPLES (empty when all agree)"""
+    failures = []
+    for prompt, expected in TEMPLATE_EXAMPLES:
+        match = match_template(prompt)
+        actual = match.template.name if match else None
+        if actual != expected:
+            failures.append(f"{prompt!r}: expected {expected}, got {actual}")
+    return failures
+
+
+class PrerenderedVariantStore:
+    """JSON manifest of rendered template variants, so repeat prompts skip rendering entirely"""
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = Path(manifest_path)
+        self._lock = threading.Lock()
+        self._variants = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read template manifest {self.manifest_path}: {e}")
+            return {}
+
+    def get(self, match: TemplateMatch) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            variant = self._variants.get(match.variant_key)
+        # Local file may have been cleaned up since it was recorded
+        if variant and not variant.get("public_video_url") and not os.path.exists(variant.get("video_path") or ""):
+            return None
+        return variant
+
+    def put(self, match: TemplateMatch, variant: Dict[str, Any]):
+        with self._lock:
+            self._variants[match.variant_key] = {
+                "template": match.template.name,
+                "params": match.params,
+                **variant,
+            }
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._variants, indent=2))
+            os.replace(tmp_path, self.manifest_path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    mismatches = check_template_examples()
+    for mismatch in mismatches:
+        print(f"❌ {mismatch}")
+    if mismatches:
+        sys.exit(1)
+    print(f"✅ All {len(TEMPLATE_EXAMPLES)} template examples classified as expected")
@@ -0,0 +1,221 @@
+import io
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+try:
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener()
+    HEIF_SUPPORTED = True
+except ImportError:  # HEIC uploads are rejected (415) instead of converted to JPEG
+    HEIF_SUPPORTED = False
+
+# Claude's vision encoder downsamples anything larger; sending more only costs upload time
+MAX_LONG_EDGE = 1568
+MAX_MEGAPIXELS = 1.15
+
+# Magic numbers for the formats the vision API accepts (plus HEIC, which phones send)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+# Formats the Claude vision API accepts
+VISION_MEDIA_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+# Page crop is only applied when it keeps at least this share of the photo
+MIN_PAGE_AREA = 0.35
+
+
+@dataclass
+class PreprocessedImage:
+    data: bytes
+    media_type: str
+    original_bytes: int
+    original_media_type: Optional[str]
+    original_size: Optional[Tuple[int, int]] = None
+    size: Optional[Tuple[int, int]] = None
+    steps: List[str] = field(default_factory=list)
+    image: Optional[Image.Image] = None  # Processed grayscale page (for fingerprinting)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "original_media_type": self.original_media_type,
+            "media_type": self.media_type,
+            "original_bytes": self.original_bytes,
+            "processed_bytes": len(self.data),
+            "bytes_saved": self.bytes_saved,
+            "original_size": list(self.original_size) if self.original_size else None,
+            "size": list(self.size) if self.size else None,
+            "steps": self.steps,
+        }
+
+
+class UnsupportedImageError(ValueError):
+    """Upload in a format that can neither be sent to the vision API nor converted"""
+
+
+def sniff_media_type(data: bytes) -> Optional[str]:
+    """Real image format from the file header (uploads are often mislabelled)"""
+    for signature, media_type in _SIGNATURES:
+        if data.startswith(signature):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    return None
+
+
+def check_image_supported(data: bytes, allow_conversion: bool = True) -> Optional[str]:
+    """
+    Sniffed media type of an upload that can be sent for OCR.
+
+    Args:
+        data: Uploaded image bytes
+        allow_conversion: Whether preprocessing will re-encode the image
+            (then anything Pillow can decode is accepted)
+
+    Raises:
+        UnsupportedImageError: The vision API can't take it as is and it can't be converted
+    """
+    media_type = sniff_media_type(data)
+    if media_type in VISION_MEDIA_TYPES:
+        return media_type
+    if allow_conversion and (media_type != "image/heic" or HEIF_SUPPORTED):
+        try:
+            Image.open(io.BytesIO(data))  # Reads the header only
+            return media_type
+        except Exception:
+            pass
+    if media_type == "image/heic":
+        raise UnsupportedImageError("HEIC images can't be processed on this server; upload a JPEG or PNG "
+                                    "(or change the camera's format to 'Most Compatible')")
+    raise UnsupportedImageError("Unsupported image format; upload a JPEG, PNG, GIF or WebP image")
+
+
+def _page_bbox(gray: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Bounding box of the page: the bright region against a darker desk/background.
+
+    Works on a small thumbnail; rows/columns count as page when most of
+    their pixels are above an Otsu threshold.
+    """
+    thumb = gray.copy()
+    thumb.thumbnail((256, 256))
+    pixels = np.asarray(thumb, dtype=np.uint8)
+
+    # Otsu threshold
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = pixels.size
+    cumulative = np.cumsum(histogram)
+    cumulative_mean = np.cumsum(histogram * np.arange(256))
+    background = cumulative[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    if not valid.any():
+        return None
+    mean_b = cumulative_mean[:-1] / np.where(background > 0, background, 1)
+    mean_f = (cumulative_mean[-1] - cumulative_mean[:-1]) / np.where(foreground > 0, foreground, 1)
+    between = np.where(valid, background * foreground * (mean_b - mean_f) ** 2, 0)
+    threshold = int(np.argmax(between))
+
+    bright = pixels > threshold
+    rows = np.where(bright.mean(axis=1) > 0.5)[0]
+    cols = np.where(bright.mean(axis=0) > 0.5)[0]
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    scale_x = gray.width / thumb.width
+    scale_y = gray.height / thumb.height
+    margin = 2  # thumbnail pixels
+    left = max(int((cols[0] - margin) * scale_x), 0)
+    top = max(int((rows[0] - margin) * scale_y), 0)
+    right = min(int((cols[-1] + 1 + margin) * scale_x), gray.width)
+    bottom = min(int((rows[-1] + 1 + margin) * scale_y), gray.height)
+    return left, top, right, bottom
+
+
+def preprocess_page_image(
+    data: bytes,
+    max_long_edge: int = MAX_LONG_EDGE,
+    max_megapixels: float = MAX_MEGAPIXELS,
+    jpeg_quality: int = 85,
+) -> PreprocessedImage:
+    """
+    Prepare a photographed book page for vision OCR.
+
+    EXIF rotation is applied, the page is converted to grayscale,
+    contrast-normalized, cropped to the page region and downsized to the
+    model's working resolution, then re-encoded as JPEG (HEIC too, when
+    pillow-heif is installed). Images Pillow can't decode are passed
+    through if the vision API accepts their format.
+
+    Args:
+        data: Uploaded image bytes
+        max_long_edge: Longest side of the output in pixels
+        max_megapixels: Maximum output pixel count (millions)
+        jpeg_quality: JPEG quality of the output
+
+    Returns:
+        PreprocessedImage with the bytes to send, their media type and what was done
+
+    Raises:
+        UnsupportedImageError: Pillow can't decode it and the vision API doesn't accept it
+    """
+    media_type = sniff_media_type(data)
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        check_image_supported(data, allow_conversion=False)
+        return PreprocessedImage(data=data, media_type=media_type, original_bytes=len(data),
+                                 original_media_type=media_type, steps=["passthrough"])
+
+    original_size = image.size
+    steps = []
+
+    rotated = ImageOps.exif_transpose(image)
+    if rotated.size != image.size or rotated.getexif().get(0x0112, 1) != image.getexif().get(0x0112, 1):
+        steps.append("exif_rotate")
+    image = rotated
+
+    image = image.convert("L")
+    steps.append("grayscale")
+
+    bbox = _page_bbox(image)
+    if bbox:
+        left, top, right, bottom = bbox
+        area = (right - left) * (bottom - top) / (image.width * image.height)
+        if MIN_PAGE_AREA <= area < 0.95:
+            image = image.crop(bbox)
+            steps.append("crop")
+
+    image = ImageOps.autocontrast(image, cutoff=1)
+    steps.append("autocontrast")
+
+    scale = min(1.0, max_long_edge / max(image.size), (max_megapixels * 1_000_000 / (image.width * image.height)) ** 0.5)
+    if scale < 1.0:
+        image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.LANCZOS)
+        steps.append("downsize")
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+    processed = output.getvalue()
+
+    # A small, already-optimized upload can come out larger - keep whichever is smaller
+    if len(processed) >= len(data) and media_type in ("image/jpeg", "image/png", "image/webp", "image/gif"):
+        return PreprocessedImage(data=data, media_type=media_type, original_bytes=len(data), original_media_type=media_type,
+                                 original_size=original_size, size=original_size, steps=["original_smaller"], image=image)
+
+    return PreprocessedImage(data=processed, media_type="image/jpeg", original_bytes=len(data), original_media_type=media_type,
+                             original_size=original_size, size=image.size, steps=steps, image=image)
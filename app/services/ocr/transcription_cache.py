@@ -0,0 +1,232 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Low-frequency 16x16 block of a 64x64 DCT (DC term dropped): keeps the
+# page layout - paragraphs, headings, figures - and ignores glyph detail,
+# lighting and JPEG noise
+HASH_SAMPLE = 64
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE - 1
+
+# Pixel-to-pixel jump that counts as an ink edge, on the 0-255 scale
+_EDGE_THRESHOLD = 40
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(HASH_SAMPLE)
+
+
+def _ink_edges(pixels: np.ndarray) -> np.ndarray:
+    return np.abs(np.diff(pixels.astype(np.int16), axis=1)) > _EDGE_THRESHOLD
+
+
+def _deskewed_text_block(gray: Image.Image) -> Image.Image:
+    """
+    Rotate the page so text lines are horizontal and crop to the text block.
+
+    The skew angle maximizes the variance of the per-row ink profile (text
+    lines become sharp peaks when level); a coarse 0.5 degree search is
+    refined in 0.1 degree steps. Page borders are trimmed first so
+    background wedges from a tilted photo don't count as ink.
+    """
+    small = gray.copy()
+    small.thumbnail((640, 640))
+    width, height = small.size
+    small = small.crop((int(width * 0.06), int(height * 0.06), int(width * 0.94), int(height * 0.94)))
+
+    def line_score(angle: float) -> float:
+        edges = _ink_edges(np.asarray(small.rotate(angle, resample=Image.BILINEAR, fillcolor=255)))
+        margin = edges.shape[1] // 10
+        return float(edges[:, margin:-margin].sum(axis=1).var())
+
+    coarse = max(np.arange(-6, 6.01, 0.5), key=line_score)
+    angle = max(np.arange(coarse - 0.5, coarse + 0.51, 0.1), key=line_score)
+    level = small.rotate(float(angle), resample=Image.BILINEAR, fillcolor=255)
+
+    edges = _ink_edges(np.asarray(level))
+    rows = np.where(edges.mean(axis=1) > 0.02)[0]
+    cols = np.where(edges.mean(axis=0) > 0.02)[0]
+    if rows.size == 0 or cols.size == 0:
+        return level
+    return level.crop((int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1))
+
+
+def page_fingerprint(image: Union[Image.Image, bytes]) -> Optional[int]:
+    """
+    Perceptual hash (DCT pHash) of a page image as a 255-bit integer.
+
+    Expects the preprocessed page (grayscale, cropped); raw bytes are
+    decoded first. The page is deskewed and cropped to its text block,
+    so re-photographs under different lighting, framing or a few degrees
+    of tilt land within a small Hamming distance. Returns None if the
+    image can't be decoded.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        try:
+            image = ImageOps.exif_transpose(Image.open(io.BytesIO(image)))
+        except Exception:
+            return None
+    gray = ImageOps.autocontrast(image.convert("L"), cutoff=1)
+    block = _deskewed_text_block(gray).resize((HASH_SAMPLE, HASH_SAMPLE), Image.BOX)
+
+    coefficients = _DCT @ np.asarray(block, dtype=np.float64) @ _DCT.T
+    low = coefficients[:HASH_SIZE, :HASH_SIZE].ravel()[1:]
+    bits = low > np.median(low)
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class TranscriptionCache:
+    """
+    Content-addressed cache of OCR transcriptions, persisted in SQLite.
+
+    Lookups first try the exact SHA-256 of the image bytes, then the
+    nearest stored perceptual fingerprint within max_distance bits, so a
+    re-photographed page still hits. Fingerprints are kept in memory for
+    the scan; transcriptions are read from disk on a hit. Least recently
+    used entries are evicted past max_entries.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000, max_distance: int = 24, namespace: str = ""):
+        """
+        Args:
+            path: SQLite file for the persistent store (memory only if None/empty)
+            max_entries: Entries kept before evicting the least recently used
+            max_distance: Largest fingerprint Hamming distance (of 255 bits) counted as the same page
+            namespace: Cache partition, e.g. the OCR model name
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS transcriptions (
+                sha256 TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                fingerprint TEXT,
+                text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, sha256)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS transcriptions_last_used ON transcriptions (last_used)")
+        self._db.commit()
+
+        # sha256 -> fingerprint for this namespace, scanned on exact misses
+        self._fingerprints: Dict[str, int] = {
+            sha256: int(fingerprint, 16)
+            for sha256, fingerprint in self._db.execute(
+                "SELECT sha256, fingerprint FROM transcriptions WHERE namespace = ? AND fingerprint IS NOT NULL", (namespace,)
+            )
+        }
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _nearest(self, fingerprint: int) -> Tuple[Optional[str], int]:
+        best_key, best_distance = None, HASH_BITS + 1
+        for key, stored in self._fingerprints.items():
+            distance = hamming_distance(fingerprint, stored)
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        return best_key, best_distance
+
+    def lookup(self, sha256: str, fingerprint: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        Cached transcription for a page, if any.
+
+        Returns:
+            {"text", "match": "exact"|"perceptual", "distance"} or None
+        """
+        with self._lock:
+            key, distance, match = sha256, 0, "exact"
+            row = self._db.execute(
+                "SELECT text FROM transcriptions WHERE namespace = ? AND sha256 = ?", (self.namespace, sha256)
+            ).fetchone()
+            if row is None and fingerprint is not None:
+                key, distance = self._nearest(fingerprint)
+                if key is not None and distance <= self.max_distance:
+                    match = "perceptual"
+                    row = self._db.execute(
+                        "SELECT text FROM transcriptions WHERE namespace = ? AND sha256 = ?", (self.namespace, key)
+                    ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE transcriptions SET last_used = ?, uses = uses + 1 WHERE namespace = ? AND sha256 = ?",
+                (time.time(), self.namespace, key),
+            )
+            self._db.commit()
+            if match == "exact":
+                self.hits += 1
+            else:
+                self.near_hits += 1
+            return {"text": row[0], "match": match, "distance": distance}
+
+    def store(self, sha256: str, fingerprint: Optional[int], text: str):
+        """Save a transcription and evict the least recently used entries past max_entries"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transcriptions (sha256, namespace, fingerprint, text, created_at, last_used, uses) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (sha256, self.namespace, f"{fingerprint:064x}" if fingerprint is not None else None, text, now, now),
+            )
+            if fingerprint is not None:
+                self._fingerprints[sha256] = fingerprint
+
+            excess = self._db.execute("SELECT count(*) FROM transcriptions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                evicted = self._db.execute(
+                    "SELECT namespace, sha256 FROM transcriptions ORDER BY last_used LIMIT ?", (excess,)
+                ).fetchall()
+                self._db.executemany("DELETE FROM transcriptions WHERE namespace = ? AND sha256 = ?", evicted)
+                for namespace, key in evicted:
+                    if namespace == self.namespace:
+                        self._fingerprints.pop(key, None)
+                self.evictions += len(evicted)
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": self._db.execute("SELECT count(*) FROM transcriptions WHERE namespace = ?", (self.namespace,)).fetchone()[0],
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,139 @@
+import re
+from typing import Any, Dict, List, Optional, Set
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+SHINGLE_SIZE = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate (no tokenizer round trip).
+
+    Words and punctuation marks are counted as pieces; long words split
+    into roughly 4-character sub-word tokens, as BPE vocabularies do.
+    Approximate, but close enough for budgeting prompt context.
+    """
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _TOKEN_RE.findall(text))
+
+
+def _shingles(text: str) -> Set[tuple]:
+    words = [word.casefold() for word in _WORD_RE.findall(text)]
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a: Set[tuple], b: Set[tuple]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _containment(a: Set[tuple], b: Set[tuple]) -> float:
+    """Share of the smaller chunk's shingles found in the larger one (catches overlapping chunk windows)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at a word boundary so it fits in max_tokens"""
+    kept, used = [], 0
+    for match in re.finditer(r"\S+\s*", text):
+        cost = estimate_tokens(match.group())
+        if used + cost > max_tokens:
+            break
+        kept.append(match.group())
+        used += cost
+    return "".join(kept).rstrip()
+
+
+def assemble_context(
+    docs: List[Any],
+    token_budget: int,
+    max_docs: Optional[int] = None,
+    duplicate_threshold: float = 0.8,
+    mmr_lambda: float = 0.7,
+    separator: str = "\n\n",
+) -> Dict[str, Any]:
+    """
+    Select and join retrieved chunks into a prompt context.
+
+    1. Near-duplicate chunks (shingle containment above `duplicate_threshold`)
+       are dropped, keeping the better-ranked copy.
+    2. The rest are ordered by Maximal Marginal Relevance: retrieval rank
+       for relevance, shingle overlap with already-picked chunks as redundancy.
+    3. Chunks are added in that order until `token_budget` is spent; the
+       first chunk is truncated rather than dropped if it alone is too big.
+
+    Args:
+        docs: Retrieved documents, best match first
+        token_budget: Maximum estimated tokens of context
+        max_docs: Maximum chunks to keep (no limit if None)
+        duplicate_threshold: Containment above which a chunk counts as a duplicate
+        mmr_lambda: Relevance vs. diversity trade-off (1.0 = rank order only)
+        separator: Joins the kept chunks
+
+    Returns:
+        Dict with `docs` (kept, in prompt order), `content` and `metrics`
+        (chunk and token counts kept vs. dropped)
+    """
+    shingles = [_shingles(doc.page_content) for doc in docs]
+    tokens = [estimate_tokens(doc.page_content) for doc in docs]
+
+    # 1. Near-duplicate removal
+    unique = []
+    for i in range(len(docs)):
+        if all(_containment(shingles[i], shingles[j]) < duplicate_threshold for j in unique):
+            unique.append(i)
+    duplicates = len(docs) - len(unique)
+
+    # 2. MMR ordering - relevance decays with retrieval rank
+    relevance = {i: 1.0 - rank / max(len(docs), 1) for rank, i in enumerate(unique)}
+    ordered, remaining = [], list(unique)
+    while remaining:
+        best = max(
+            remaining,
+            key=lambda i: mmr_lambda * relevance[i]
+            - (1 - mmr_lambda) * max((_jaccard(shingles[i], shingles[j]) for j in ordered), default=0.0),
+        )
+        ordered.append(best)
+        remaining.remove(best)
+
+    # 3. Token budget
+    kept_docs, parts, used, over_budget = [], [], 0, 0
+    separator_tokens = estimate_tokens(separator)
+    for i in ordered:
+        if max_docs is not None and len(kept_docs) >= max_docs:
+            over_budget += 1
+            continue
+        cost = tokens[i] + (separator_tokens if parts else 0)
+        if used + cost <= token_budget:
+            parts.append(docs[i].page_content)
+            kept_docs.append(docs[i])
+            used += cost
+        elif not parts:
+            truncated = _truncate_to_tokens(docs[i].page_content, token_budget)
+            parts.append(truncated)
+            kept_docs.append(docs[i])
+            used += estimate_tokens(truncated)
+        else:
+            over_budget += 1
+
+    total_tokens = sum(tokens)
+    return {
+        "docs": kept_docs,
+        "content": separator.join(parts),
+        "metrics": {
+            "chunks_retrieved": len(docs),
+            "chunks_kept": len(kept_docs),
+            "chunks_dropped_duplicate": duplicates,
+            "chunks_dropped_budget": over_budget,
+            "tokens_retrieved": total_tokens,
+            "tokens_kept": used,
+            "tokens_dropped": max(total_tokens - used, 0),
+            "token_budget": token_budget,
+        },
+    }
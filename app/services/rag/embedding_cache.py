@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key normalization: NFC, collapsed whitespace, case-folded"""
+    return " ".join(unicodedata.normalize("NFC", text).split()).casefold()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-memory LRU and an optional on-disk store.
+
+    Entries are keyed by model name + kind ("query" or "document") +
+    normalized text, so the same prompt is only embedded once per model
+    and task type, across requests and (with a disk store) across
+    restarts. Query and document vectors are kept apart because Vertex
+    embeds them with different task types (RETRIEVAL_QUERY vs
+    RETRIEVAL_DOCUMENT).
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024, disk_path: Optional[str] = None, model_name: Optional[str] = None):
+        """
+        Args:
+            embeddings: Underlying embedding model (e.g. VertexAIEmbeddings)
+            max_entries: Size of the in-memory LRU
+            disk_path: SQLite file for the persistent store (memory only if None/empty)
+            model_name: Cache namespace (defaults to the wrapped model's model_name)
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name or getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._disk.commit()
+
+    def _key(self, text: str, kind: str) -> str:
+        """Cache key for a text embedded as kind ("query" or "document")"""
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        """Insert into the LRU (caller holds the lock)"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._disk is not None:
+                row = self._disk.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = array("f", row[0]).tolist()
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def _store(self, key: str, vector: List[float]):
+        with self._lock:
+            self._remember(key, vector)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, array("f", vector).tobytes()),
+                )
+                self._disk.commit()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, "query")
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text, "document") for text in texts]
+        vectors = [self._lookup(key) for key in keys]
+
+        # Embed only the misses, in one batch
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                self._store(keys[i], vector)
+                vectors[i] = vector
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.services.rag.exemplars import EXEMPLAR_LIMIT
+
+# Every chapter's first few questions, in the same order as EXEMPLAR_QUESTIONS_QUERY
+EXEMPLAR_BANK_QUERY = text("""
+    SELECT question, chapter_id, topic_id, vector_id, topic_name
+    FROM (
+        SELECT
+            q.question,
+            q.chapter_id,
+            q.topic_id,
+            c.vector_id,
+            t.name AS topic_name,
+            ROW_NUMBER() OVER (
+                PARTITION BY c.vector_id
+                ORDER BY q.topic_id, q.question_id
+            ) AS rn
+        FROM questions q
+        INNER JOIN chapters c ON q.chapter_id = c.chapter_id
+        INNER JOIN topics t ON q.topic_id = t.topic_id
+        WHERE c.vector_id IS NOT NULL
+    ) ranked
+    WHERE rn <= :per_chapter
+    ORDER BY vector_id, rn
+""")
+
+# Cheap change detector: row counts plus Postgres' cumulative write counters
+# for the three tables (catch in-place UPDATEs that leave counts unchanged)
+EXEMPLAR_VERSION_QUERY = text("""
+    SELECT
+        (SELECT count(*) FROM questions),
+        (SELECT coalesce(max(question_id), 0) FROM questions),
+        (SELECT count(*) FROM chapters),
+        (SELECT count(*) FROM topics),
+        (SELECT coalesce(sum(n_tup_ins + n_tup_upd + n_tup_del), 0)
+           FROM pg_stat_user_tables
+          WHERE relname IN ('questions', 'chapters', 'topics'))
+""")
+
+
+class ExemplarBank:
+    """
+    In-memory copy of the example questions, keyed by chapter vector_id.
+
+    Loaded in the background at startup and swapped wholesale when the version query
+    reports a change, so RAG requests pick exemplars without a database
+    round trip. Rows have the same shape as fetch_exemplar_questions:
+    (question, chapter_id, topic_id, vector_id, topic_name).
+    """
+
+    def __init__(self, max_per_chapter: int = EXEMPLAR_LIMIT):
+        """
+        Args:
+            max_per_chapter: Questions kept per chapter (the prompts only show EXEMPLAR_LIMIT)
+        """
+        self.max_per_chapter = max_per_chapter
+        self._by_vector_id: Dict[str, Tuple[tuple, ...]] = {}
+        self.version: Optional[tuple] = None
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    async def load(self, engine: AsyncEngine):
+        """Load every chapter's exemplars in one query and swap them in"""
+        started = time.perf_counter()
+        async with engine.connect() as conn:
+            version = tuple((await conn.execute(EXEMPLAR_VERSION_QUERY)).one())
+            result = await conn.execute(EXEMPLAR_BANK_QUERY, {"per_chapter": self.max_per_chapter})
+            rows = result.fetchall()
+
+        by_vector_id: Dict[str, List[tuple]] = {}
+        for question, chapter_id, topic_id, vector_id, topic_name in rows:
+            by_vector_id.setdefault(vector_id, []).append((question, chapter_id, topic_id, vector_id, topic_name))
+
+        # Single assignment - readers see either the old bank or the new one
+        self._by_vector_id = {vector_id: tuple(chapter_rows) for vector_id, chapter_rows in by_vector_id.items()}
+        self.version = version
+        self.loaded_at = time.time()
+        self.reloads += 1
+        print(f"📚 Exemplar bank loaded: {len(rows)} questions for {len(by_vector_id)} chapters in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    async def refresh_if_changed(self, engine: AsyncEngine) -> bool:
+        """Reload if the tables changed since the last load; returns whether it reloaded"""
+        async with engine.connect() as conn:
+            version = tuple((await conn.execute(EXEMPLAR_VERSION_QUERY)).one())
+        if version == self.version:
+            return False
+        print(f"🔄 Exemplar tables changed ({self.version} -> {version}), reloading bank")
+        await self.load(engine)
+        return True
+
+    async def _refresh_loop(self, engine: AsyncEngine, interval: float):
+        """First load right away, then a version check every interval (retrying the load until it succeeds)"""
+        while True:
+            try:
+                if self.loaded:
+                    await self.refresh_if_changed(engine)
+                else:
+                    await self.load(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.loaded:
+                    print(f"⚠️  Exemplar bank refresh failed (keeping current copy): {e}")
+                else:
+                    # Requests fall back to querying Postgres until a load succeeds
+                    print(f"⚠️  Exemplar bank load failed, using SQL exemplars for now: {e}")
+            if not interval:
+                return
+            await asyncio.sleep(interval)
+
+    def start(self, engine: AsyncEngine, refresh_seconds: float = 60):
+        """
+        Load the bank in the background, then check for changes every refresh_seconds.
+
+        Returns immediately so startup never waits on Postgres; until the
+        first load succeeds, lookups use per-request SQL exemplars.
+        """
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(engine, refresh_seconds))
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def select(self, vector_ids: Sequence[str], limit: int = EXEMPLAR_LIMIT, per_chapter: int = EXEMPLAR_LIMIT) -> List[tuple]:
+        """Same rows fetch_exemplar_questions would return: chapters in priority order, capped per chapter and in total"""
+        selected = []
+        for vector_id in dict.fromkeys(vector_ids):
+            for row in self._by_vector_id.get(vector_id, ())[:per_chapter]:
+                if len(selected) >= limit:
+                    return selected
+                selected.append(row)
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "chapters": len(self._by_vector_id),
+            "questions": sum(len(rows) for rows in self._by_vector_id.values()),
+            "version": list(self.version) if self.version else None,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+        }
+
+
+# One bank per process, shared by every RAG agent
+exemplar_bank = ExemplarBank()
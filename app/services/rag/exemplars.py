@@ -0,0 +1,102 @@
+from typing import List, Optional, Sequence
+
+from sqlalchemy import bindparam, text, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection
+
+# The prompts only ever show this many example questions
+EXEMPLAR_LIMIT = 3
+
+# One statement for every request: identical SQL text lets asyncpg reuse the
+# prepared statement it caches on each pooled connection.
+# array_position(varchar[], text) needs PostgreSQL 13 or later.
+EXEMPLAR_QUESTIONS_QUERY = text("""
+    SELECT question, chapter_id, topic_id, vector_id, topic_name
+    FROM (
+        SELECT
+            q.question,
+            q.chapter_id,
+            q.topic_id,
+            c.vector_id,
+            t.name AS topic_name,
+            ROW_NUMBER() OVER (
+                PARTITION BY c.vector_id
+                ORDER BY q.topic_id, q.question_id
+            ) AS rn
+        FROM questions q
+        INNER JOIN chapters c ON q.chapter_id = c.chapter_id
+        INNER JOIN topics t ON q.topic_id = t.topic_id
+        WHERE c.vector_id = ANY(:ids)
+    ) ranked
+    WHERE rn <= :per_chapter
+    ORDER BY array_position(:ids, vector_id), rn
+    LIMIT :total_limit
+""").bindparams(bindparam("ids", type_=ARRAY(String)))
+
+
+async def fetch_exemplar_questions(
+    engine: AsyncEngine,
+    vector_ids: Sequence[str],
+    limit: int = EXEMPLAR_LIMIT,
+    per_chapter: int = EXEMPLAR_LIMIT,
+    connection: Optional[AsyncConnection] = None,
+) -> List[tuple]:
+    """
+    Fetch example questions for several chapters in one round trip.
+
+    Args:
+        engine: Async SQLAlchemy engine
+        vector_ids: Chapter vector_ids (Firestore display_names) as an ordered
+            sequence - rows come back in this order, so pass a list (not a set)
+            when priority matters
+        limit: Total rows to return
+        per_chapter: Maximum rows from any one chapter
+        connection: Already checked-out connection to use instead of the pool
+
+    Returns:
+        Rows of (question, chapter_id, topic_id, vector_id, topic_name)
+    """
+    if not vector_ids:
+        return []
+
+    print(f"\n{'~'*80}")
+    print(f"💾 PostgreSQL Query for {len(vector_ids)} vector_ids: {list(vector_ids)}")
+    print(f"   Limit: {limit} total, {per_chapter} per chapter")
+
+    params = {"ids": list(vector_ids), "per_chapter": per_chapter, "total_limit": limit}
+    try:
+        if connection is not None:
+            result = await connection.execute(EXEMPLAR_QUESTIONS_QUERY, params)
+        else:
+            async with engine.connect() as conn:
+                result = await conn.execute(EXEMPLAR_QUESTIONS_QUERY, params)
+        questions = result.fetchall()
+        print(f"   ✅ Found {len(questions)} questions")
+
+        if questions:
+            print("\n   📋 Question Details:")
+            for i, (question, chapter_id, topic_id, vec_id, topic_name) in enumerate(questions, 1):
+                print(f"      {i}. Chapter ID: {chapter_id}, Topic ID: {topic_id} ({vec_id})")
+                print(f"         Topic: {topic_name}")
+                print(f"         Question: {question[:100]}{'...' if len(question) > 100 else ''}")
+                print()
+        else:
+            print("   ⚠️  No questions found for these vector_ids")
+
+        print(f"{'~'*80}\n")
+        return questions
+    except Exception as e:
+        print(f"   ❌ SQL Error: {e}")
+        print(f"{'~'*80}\n")
+        return []
+
+
+def format_exemplar_questions(questions: Sequence[tuple]) -> str:
+    """Render example questions as the prompt's 'Related Example Questions' block"""
+    if not questions:
+        return ""
+
+    formatted_questions = "\n\nRelated Example Questions:\n"
+    for i, (question, chapter_id, topic_id, vector_id, topic_name) in enumerate(questions[:EXEMPLAR_LIMIT], 1):
+        formatted_questions += f"{i}. Topic: {topic_name}\n   Question: {question}\n\n"
+    return formatted_questions
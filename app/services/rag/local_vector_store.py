@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.f32"
+DOCUMENTS_FILE = "documents.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Read-only vector store backed by a memory-mapped float32 matrix.
+
+    Vectors are L2-normalized when the index is built, so an exact
+    vectorized dot product gives cosine similarity (Firestore's distance
+    measure for our collections). Documents keep Firestore's metadata
+    shape, including the nested `metadata.display_name`.
+    """
+
+    def __init__(self, index_dir: str, embedding: Embeddings):
+        self.index_dir = index_dir
+        self._embedding = embedding
+
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        count, dim = self.manifest["count"], self.manifest["dim"]
+
+        # Pages are loaded lazily by the OS and shared between worker processes
+        self._vectors = np.memmap(os.path.join(index_dir, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dim))
+        with open(os.path.join(index_dir, DOCUMENTS_FILE)) as f:
+            self._documents = [json.loads(line) for line in f]
+
+        if len(self._documents) != count:
+            raise ValueError(f"Index {index_dir} is inconsistent: {count} vectors, {len(self._documents)} documents")
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @classmethod
+    def load(cls, index_dir: str, embedding: Embeddings) -> "LocalVectorStore":
+        return cls(index_dir, embedding)
+
+    @staticmethod
+    def build(index_dir: str, vectors: Iterable[List[float]], documents: Iterable[Dict[str, Any]], model_name: Optional[str] = None) -> int:
+        """
+        Write an index to disk.
+
+        Args:
+            index_dir: Directory for the index files
+            vectors: One embedding per document
+            documents: Dicts with `page_content` and `metadata`
+            model_name: Embedding model the vectors came from (recorded in the manifest)
+
+        Returns:
+            Number of vectors written
+        """
+        matrix = np.asarray(list(vectors), dtype=np.float32)
+        documents = list(documents)
+        if matrix.ndim != 2 or len(matrix) != len(documents):
+            raise ValueError(f"Expected one vector per document, got {matrix.shape} for {len(documents)} documents")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.maximum(norms, 1e-12)
+
+        os.makedirs(index_dir, exist_ok=True)
+        matrix.tofile(os.path.join(index_dir, VECTORS_FILE))
+        with open(os.path.join(index_dir, DOCUMENTS_FILE), "w") as f:
+            for document in documents:
+                f.write(json.dumps(document, default=str) + "\n")
+        with open(os.path.join(index_dir, MANIFEST_FILE), "w") as f:
+            json.dump({"count": len(matrix), "dim": matrix.shape[1], "normalized": True, "model_name": model_name}, f, indent=2)
+        return len(matrix)
+
+    def _document(self, index: int) -> Document:
+        stored = self._documents[index]
+        return Document(page_content=stored["page_content"], metadata=stored.get("metadata", {}))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        scores = self._vectors @ query
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        # argpartition is O(n); only the k winners get sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._document(int(i)), float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k=k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k=k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k=k)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Cosine similarity in [-1, 1] -> relevance in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("LocalVectorStore is read-only; rebuild the index with export_firestore_collection")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, index_dir: str = None, **kwargs: Any) -> "LocalVectorStore":
+        if not index_dir:
+            raise ValueError("index_dir is required")
+        metadatas = metadatas or [{} for _ in texts]
+        cls.build(
+            index_dir,
+            embedding.embed_documents(list(texts)),
+            [{"page_content": text, "metadata": metadata} for text, metadata in zip(texts, metadatas)],
+            model_name=getattr(embedding, "model_name", None),
+        )
+        return cls(index_dir, embedding)
+
+
+def export_firestore_collection(
+    client,
+    collection_name: str,
+    index_dir: str,
+    content_field: str = "content",
+    embedding_field: str = "embedding",
+    metadata_field: str = "metadata",
+    model_name: Optional[str] = None,
+) -> int:
+    """
+    Export a FirestoreVectorStore collection into a local index.
+
+    Documents keep the same metadata layout FirestoreVectorStore returns
+    (`reference` plus the nested `metadata` map), so code reading
+    doc.metadata['metadata']['display_name'] works unchanged.
+
+    Returns:
+        Number of documents exported
+    """
+    vectors, documents = [], []
+    for snapshot in client.collection(collection_name).stream():
+        data = snapshot.to_dict()
+        embedding = data.get(embedding_field)
+        if embedding is None:
+            continue
+        documents.append({
+            "page_content": data.get(content_field, ""),
+            "metadata": {
+                "reference": {"path": snapshot.reference.path, "id": snapshot.id},
+                metadata_field: data.get(metadata_field, {}),
+            },
+        })
+        vectors.append([float(value) for value in list(embedding)])
+
+    print(f"📦 Exporting {len(documents)} documents from '{collection_name}' to {index_dir}")
+    return LocalVectorStore.build(index_dir, vectors, documents, model_name=model_name)
+
+
+def create_vectorstore(collection_name: str, embeddings: Embeddings, firestore_client_factory: Callable[[], Any], backend: str, local_index_dir: str) -> VectorStore:
+    """
+    Build the configured vector store for a collection.
+
+    Args:
+        collection_name: Firestore collection (also the local index sub-directory)
+        embeddings: Query embedding model
+        firestore_client_factory: Creates the Firestore client (only called for the firestore backend)
+        backend: "firestore" or "local"
+        local_index_dir: Root directory of exported local indexes
+    """
+    if backend == "local":
+        index_dir = os.path.join(local_index_dir, collection_name)
+        print(f"📂 Using local vector index: {index_dir}")
+        return LocalVectorStore.load(index_dir, embeddings)
+
+    from langchain_google_firestore import FirestoreVectorStore
+
+    return FirestoreVectorStore(
+        collection=collection_name,
+        embedding_service=embeddings,
+        client=firestore_client_factory(),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a Firestore vector collection to a local memory-mapped index")
+    parser.add_argument("collection", help="Firestore collection name")
+    parser.add_argument("--project", required=True, help="GCP project that owns the collection")
+    parser.add_argument("--credentials", help="Service account JSON (default credentials if omitted)")
+    parser.add_argument("--output", default="data/vector_index", help="Root directory for local indexes")
+    args = parser.parse_args()
+
+    from google.cloud import firestore
+    from google.oauth2 import service_account
+
+    credentials = service_account.Credentials.from_service_account_file(args.credentials) if args.credentials else None
+    firestore_client = firestore.Client(project=args.project, credentials=credentials)
+    count = export_firestore_collection(
+        firestore_client,
+        args.collection,
+        os.path.join(args.output, args.collection),
+        model_name="text-embedding-004",
+    )
+    print(f"✅ Exported {count} vectors")
@@ -0,0 +1,109 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.services.rag.exemplars import fetch_exemplar_questions
+from app.services.rag.exemplar_bank import exemplar_bank
+
+# Vertex embeddings and Firestore vector search only have blocking clients.
+# They run here, bounded, instead of on the event loop or the default executor.
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=settings.rag_retrieval_workers,
+    thread_name_prefix="rag-retrieval",
+)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking retrieval call on the bounded retrieval pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_retrieval_executor, functools.partial(func, *args, **kwargs))
+
+
+async def aembed_query(embeddings, query: str) -> List[float]:
+    return await run_blocking(embeddings.embed_query, query)
+
+
+async def aretrieve(vectorstore, embeddings, query: str, k: int = None) -> Tuple[list, List[float]]:
+    """
+    Embed the query and run the vector search without blocking the event loop.
+
+    Returns:
+        Tuple of (documents, query_embedding) - the embedding is returned so
+        callers can reuse it (e.g. for semantic caching) without re-embedding
+    """
+    query_embedding = await aembed_query(embeddings, query)
+    docs = await run_blocking(vectorstore.similarity_search_by_vector, query_embedding, k=k or settings.rag_retrieval_k)
+    return docs, query_embedding
+
+
+async def retrieve_with_exemplars(
+    vectorstore,
+    embeddings,
+    engine: AsyncEngine,
+    query: str,
+    format_docs: Callable[[list], Dict[str, Any]],
+    k: int = None,
+) -> Dict[str, Any]:
+    """
+    Retrieve documents and their chapters' example questions.
+
+    Exemplars come from the in-memory exemplar bank when it is loaded (no
+    database round trip). Otherwise a pooled SQL connection is checked out
+    while the query is embedded and searched, then used for the exemplar
+    query as soon as the display_names are known.
+
+    Args:
+        vectorstore: Vector store supporting similarity_search_by_vector
+        embeddings: Embedding model used for the query
+        engine: Async SQLAlchemy engine for the exemplar questions
+        query: Query text
+        format_docs: Turns documents into {'content', 'display_names'}
+        k: Number of documents to retrieve
+
+    Returns:
+        Dict with `docs`, `doc_info` (output of format_docs), `questions`
+        (exemplar rows) and `query_embedding`
+    """
+    if exemplar_bank.loaded:
+        docs, query_embedding = await aretrieve(vectorstore, embeddings, query, k=k)
+        doc_info = format_docs(docs)
+        questions = exemplar_bank.select(doc_info['display_names'])
+        print(f"📚 {len(questions)} exemplar questions from the in-memory bank")
+        return {
+            'docs': docs,
+            'doc_info': doc_info,
+            'questions': questions,
+            'query_embedding': query_embedding,
+        }
+
+    connection = engine.connect()
+    connect_task = asyncio.create_task(connection.start())
+    try:
+        docs, query_embedding = await aretrieve(vectorstore, embeddings, query, k=k)
+        doc_info = format_docs(docs)
+
+        try:
+            await connect_task
+        except Exception as e:
+            print(f"   ❌ SQL connection error: {e}")
+            questions = []
+        else:
+            questions = await fetch_exemplar_questions(engine, doc_info['display_names'], connection=connection)
+
+        return {
+            'docs': docs,
+            'doc_info': doc_info,
+            'questions': questions,
+            'query_embedding': query_embedding,
+        }
+    finally:
+        if not connect_task.done():
+            connect_task.cancel()
+        try:
+            await connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.services.rag.embedding_cache import CachedEmbeddings
+from app.services.rag.local_vector_store import create_vectorstore
+
+PROJECT_ID = "krishi-saarthi-main"
+OLD_PROJECT_ID = "sahayak-ai-agentic-ai-day"
+LOCATION = "us-central1"
+
+# New credentials for Vertex AI
+NEW_CREDENTIALS_PATH = "/Users/divyansh/Desktop/Divyansh/Development/Hackathons/AgenticAIDays/final/pragati-backend/secrets/anthropic-sahayak-main-6808fd9290d7.json"
+# Old credentials for Firestore (has existing indexes)
+OLD_CREDENTIALS_PATH = "/Users/divyansh/Desktop/Divyansh/Development/Hackathons/AgenticAIDays/final/pragati-backend/secrets/older/sahayak-ai-credentials.json"
+
+CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
+EMBEDDING_MODEL = "text-embedding-004"
+
+
+class RagRuntime:
+    """
+    Process-wide owner of the clients the RAG agents share.
+
+    Vertex AI initialization, the embedding model (and its cache), the
+    Firestore client, one vector store per collection, Claude clients (one
+    per distinct configuration) and the database engine are each created
+    on first use and then reused by every agent. Agents keep their own
+    prompts and collection names.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vertex_initialized = False
+        self._embeddings: Optional[CachedEmbeddings] = None
+        self._firestore_client = None
+        self._vectorstores: Dict[str, Any] = {}
+        self._chat_models: Dict[tuple, Any] = {}
+        self.created: Dict[str, float] = {}  # Component -> seconds it took to create
+
+    def _timed(self, name: str, started: float):
+        self.created[name] = round(time.perf_counter() - started, 3)
+        print(f"🧩 RAG runtime: {name} ready in {self.created[name] * 1000:.0f} ms")
+
+    def init_vertex(self):
+        """vertexai.init with the Vertex AI credentials, once per process"""
+        with self._lock:
+            if self._vertex_initialized:
+                return
+            started = time.perf_counter()
+            import vertexai
+
+            load_dotenv()
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = NEW_CREDENTIALS_PATH
+            vertexai.init(project=PROJECT_ID, location=LOCATION)
+            self._vertex_initialized = True
+            self._timed("vertexai", started)
+
+    @property
+    def embeddings(self) -> CachedEmbeddings:
+        """Cached Vertex embedding model (repeated text skips the Vertex round trip)"""
+        with self._lock:
+            if self._embeddings is None:
+                self.init_vertex()
+                started = time.perf_counter()
+                from langchain_google_vertexai import VertexAIEmbeddings
+
+                self._embeddings = CachedEmbeddings(
+                    VertexAIEmbeddings(model_name=EMBEDDING_MODEL, project=PROJECT_ID, location=LOCATION),
+                    max_entries=settings.embedding_cache_size,
+                    disk_path=settings.embedding_cache_path or None,
+                )
+                self._timed("embeddings", started)
+            return self._embeddings
+
+    def firestore_client(self):
+        """Firestore client with OLD credentials (for existing indexes)"""
+        with self._lock:
+            if self._firestore_client is None:
+                started = time.perf_counter()
+                from google.cloud import firestore
+                from google.oauth2 import service_account
+
+                credentials = service_account.Credentials.from_service_account_file(OLD_CREDENTIALS_PATH)
+                self._firestore_client = firestore.Client(project=OLD_PROJECT_ID, credentials=credentials)
+                self._timed("firestore", started)
+            return self._firestore_client
+
+    def vectorstore(self, collection_name: str):
+        """Vector store for a collection (Firestore, or a local exported index)"""
+        with self._lock:
+            if collection_name not in self._vectorstores:
+                embeddings = self.embeddings
+                started = time.perf_counter()
+                self._vectorstores[collection_name] = create_vectorstore(
+                    collection_name,
+                    embeddings,
+                    self.firestore_client,
+                    backend=settings.rag_vector_backend,
+                    local_index_dir=settings.rag_local_index_dir,
+                )
+                self._timed(f"vectorstore:{collection_name}", started)
+            return self._vectorstores[collection_name]
+
+    def chat_model(self, model: str = CLAUDE_MODEL, temperature: float = 0, max_tokens: int = 8096, max_retries: int = 6):
+        """
+        Claude client shared by every caller asking for the same configuration.
+
+        Args:
+            model: Claude model name
+            temperature: Sampling temperature
+            max_tokens: Output token limit
+            max_retries: Retries on rate limits / transient errors
+        """
+        key = (model, temperature, max_tokens, max_retries)
+        with self._lock:
+            if key not in self._chat_models:
+                started = time.perf_counter()
+                from langchain_anthropic import ChatAnthropic
+
+                self._chat_models[key] = ChatAnthropic(
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    max_retries=max_retries,
+                )
+                self._timed(f"chat_model:{model}", started)
+            return self._chat_models[key]
+
+    @property
+    def engine(self):
+        """The shared, lifespan-managed database engine"""
+        return get_engine()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "vertexai": self._vertex_initialized,
+                "embeddings": self._embeddings.stats() if self._embeddings is not None else None,
+                "firestore": self._firestore_client is not None,
+                "vectorstores": sorted(self._vectorstores),
+                "chat_models": [{"model": key[0], "max_tokens": key[2]} for key in self._chat_models],
+                "created_seconds": dict(self.created),
+            }
+
+
+# One runtime per process, borrowed by every RAG agent
+rag_runtime = RagRuntime()
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class _CacheEntry:
+    embedding: np.ndarray  # L2-normalized query embedding
+    chapters: Tuple[str, ...]  # Sorted display_names the response was generated from
+    response: Any
+    created_at: float
+
+
+class SemanticResponseCache:
+    """
+    Response cache keyed by query meaning rather than exact text.
+
+    A lookup hits when a stored query is within `threshold` cosine
+    similarity of the new one AND was answered from the same retrieved
+    chapters, so paraphrases reuse an answer but a request that pulls in
+    different context never does. Entries expire after `ttl_seconds`;
+    beyond `max_entries` the least recently used entry is dropped.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 86400, threshold: float = 0.95):
+        """
+        Args:
+            max_entries: Maximum cached responses
+            ttl_seconds: Lifetime of a cached response
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    @staticmethod
+    def _chapters_key(chapters: Iterable[str]) -> Tuple[str, ...]:
+        return tuple(sorted(set(chapters)))
+
+    def _evict_expired(self, now: float):
+        """Drop expired entries (caller holds the lock)"""
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, embedding: List[float], chapters: Iterable[str]) -> Optional[Tuple[Any, float]]:
+        """
+        Find a cached response for a similar query over the same chapters.
+
+        Returns:
+            Tuple of (response, similarity) on a hit, otherwise None
+        """
+        query = self._normalize(embedding)
+        chapters_key = self._chapters_key(chapters)
+
+        with self._lock:
+            self._evict_expired(time.time())
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry.chapters == chapters_key]
+            if candidates:
+                similarities = np.stack([entry.embedding for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.response, float(similarities[best])
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding: List[float], chapters: Iterable[str], response: Any):
+        """Cache a response, replacing any near-identical entry for the same chapters"""
+        query = self._normalize(embedding)
+        chapters_key = self._chapters_key(chapters)
+
+        with self._lock:
+            now = time.time()
+            self._evict_expired(now)
+            for key, entry in list(self._entries.items()):
+                if entry.chapters == chapters_key and float(entry.embedding @ query) >= self.threshold:
+                    del self._entries[key]
+
+            self._entries[self._next_id] = _CacheEntry(query, chapters_key, response, now)
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+            }
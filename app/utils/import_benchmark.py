@@ -0,0 +1,79 @@
+"""
+Import-time benchmark guarding worker cold start.
+
+Imports the application in fresh interpreters and fails (exit code 1)
+when the median import time exceeds the budget, listing the slowest
+modules from `python -X importtime`:
+
+    python -m app.utils.import_benchmark --max-seconds 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def time_import(module: str) -> Tuple[float, str]:
+    """Wall-clock seconds to import a module in a fresh interpreter, plus its -X importtime report"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def slowest_modules(report: str, top: int = 15) -> List[Tuple[int, str]]:
+    """Top-level imports by cumulative time (microseconds) from an -X importtime report"""
+    modules = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        cumulative = cumulative.strip()
+        if cumulative.isdigit():
+            modules.append((int(cumulative), name))
+    # The module itself and its direct imports - deeper ones are counted in their parents
+    indent = min((len(name) - len(name.lstrip()) for _, name in modules), default=0)
+    top_level = [(cumulative, name.strip()) for cumulative, name in modules if len(name) - len(name.lstrip()) <= indent + 2]
+    return sorted(top_level, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the application takes longer than the budget")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--max-seconds", type=float, default=3.0, help="Budget for the median import time")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time")
+    args = parser.parse_args()
+
+    timings = []
+    report = ""
+    for _ in range(max(args.runs, 1)):
+        elapsed, report = time_import(args.module)
+        timings.append(elapsed)
+    median = statistics.median(timings)
+
+    print(f"⏱️  import {args.module}: median {median:.2f}s over {len(timings)} runs "
+          f"(min {min(timings):.2f}s, max {max(timings):.2f}s, budget {args.max_seconds:.2f}s)")
+    print("Slowest imports (cumulative):")
+    for cumulative, name in slowest_modules(report):
+        print(f"  {cumulative / 1_000_000:6.2f}s  {name}")
+
+    if median > args.max_seconds:
+        print(f"❌ Import time over budget by {median - args.max_seconds:.2f}s")
+        sys.exit(1)
+    print("✅ Import time within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+from typing import Any, List, Tuple
+
+
+class JsonObjectStreamParser:
+    """
+    Incremental parser for a streamed top-level JSON object.
+
+    Feed it chunks of model output as they arrive; it returns each
+    top-level member as a (key, value) pair as soon as that member's value
+    is complete, without waiting for the rest of the object. Text before
+    the opening brace (e.g. a ```json fence) is ignored.
+
+    Example:
+        parser = JsonObjectStreamParser()
+        for chunk in chunks:
+            for key, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None  # Buffer index where the current member begins
+        self._member_emitted = False
+        self.done = False
+        self.members = {}
+
+    def _parse_member(self, end: int) -> List[Tuple[str, Any]]:
+        text = self._buffer[self._member_start:end].strip()
+        self._member_emitted = True
+        if not text:
+            return []
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError:
+            return []
+        self.members.update(member)
+        return list(member.items())
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add a chunk of text.
+
+        Returns:
+            The (key, value) members completed by this chunk, in order
+        """
+        completed = []
+        self._buffer += chunk
+
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+                    self._member_emitted = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and not self._member_emitted:
+                    # A nested object/array value just closed - its member is complete
+                    completed.extend(self._parse_member(self._pos + 1))
+                elif self._depth == 0:
+                    if not self._member_emitted:
+                        completed.extend(self._parse_member(self._pos))
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                if not self._member_emitted:
+                    completed.extend(self._parse_member(self._pos))
+                self._member_start = self._pos + 1
+                self._member_emitted = False
+
+            self._pos += 1
+
+        return completed
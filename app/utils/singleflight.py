@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import json
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def normalize_request_text(text: str) -> str:
+    """NFC, collapsed whitespace, case-folded - identical requests differ only in these"""
+    return " ".join(unicodedata.normalize("NFC", text).split()).casefold()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent async calls.
+
+    The first caller for a key starts the computation; callers arriving
+    while it is in flight await the same task and share its result (or
+    exception). The key is forgotten as soon as the task finishes, so
+    later calls compute afresh - this is de-duplication, not caching.
+
+    Each computation runs under its own timeout; when it expires the task
+    is cancelled and every waiter gets asyncio.TimeoutError. A waiter
+    being cancelled (e.g. a client disconnect) does not cancel the shared
+    computation for the others.
+    """
+
+    def __init__(self, name: str, timeout: Optional[float] = None):
+        """
+        Args:
+            name: Label used in logs
+            timeout: Default per-key timeout in seconds (None = no timeout)
+        """
+        self.name = name
+        self.timeout = timeout
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Stable key from normalized text and request parameters"""
+        normalized = [normalize_request_text(part) if isinstance(part, str) else part for part in parts]
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run func() once per key among concurrent callers.
+
+        Args:
+            key: Request identity (see make_key)
+            func: Zero-argument coroutine function doing the work
+            timeout: Timeout for this key's computation (defaults to the instance timeout)
+
+        Returns:
+            The shared result
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            timeout = self.timeout if timeout is None else timeout
+            task = asyncio.ensure_future(asyncio.wait_for(func(), timeout) if timeout else func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            print(f"🔗 [{self.name}] Joining in-flight request ({len(self._in_flight)} in flight, {self.coalesced} coalesced so far)")
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every waiter went away
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,14 @@
+import json
+from typing import Any
+
+# Headers for text/event-stream responses (no proxy buffering, no caching)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """Serialize one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
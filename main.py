@@ -1,12 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.database import get_engine, dispose_engine
 from app.core.config import settings
 from app.api.router import api_router
 from app.models.response import MessageResponse
+from app.services.rag.exemplar_bank import exemplar_bank
+from app.core.lazy import parse_names, prewarm
 import uvicorn
 
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Shared database pool, exemplar question bank and agent pre-warming for the application's lifetime"""
+    engine = get_engine()
+    # The exemplar bank and pre-warmed agents load in the background so the
+    # server starts accepting requests immediately (even with Postgres down)
+    if settings.exemplar_bank_enabled:
+        exemplar_bank.start(engine, refresh_seconds=settings.exemplar_bank_refresh_seconds)
+    # Agents otherwise load on their first request
+    prewarm_task = asyncio.create_task(prewarm(parse_names(settings.prewarm_agents))) if settings.prewarm_agents else None
+    yield
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    await exemplar_bank.stop()
+    await dispose_engine()
+
+
+app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,